@@ -1,16 +1,553 @@
+import csv
+import functools
+import json
 import math
-import matplotlib.pyplot as plt
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict
+
+# Ограничение на число элементов матрицы p×k, обрабатываемой за один шаг
+SWEEP_CHUNK_ELEMENTS = 1 << 22
+# Число точек сетки, по которой строятся графики
+PLOT_POINTS = 200
+# До такого n график гипергеометрической энтропии строится по проходу по всем k:
+# он дешевле PLOT_POINTS отдельных вычислений, дальше — наоборот
+HYPERGEOMETRIC_SWEEP_LIMIT = 1 << 18
+# Точность поиска максимума энтропии по p
+MAXIMUM_TOLERANCE = 1e-8
+# Подписи графиков: кривая, ось x, ось y, заголовок
+BINOMIAL_LABELS = ('H(p)', 'Вероятность p', 'Энтропия H(p)', 'Энтропия биномиального распределения')
+GEOMETRIC_LABELS = ('H(p)', 'Вероятность p', 'Энтропия H(p)', 'Энтропия геометрического распределения')
+HYPERGEOMETRIC_LABELS = ('H(k)', 'Количество стандартных изделий k', 'Энтропия H(k)',
+                         'Энтропия гипергеометрического распределения')
+# Порог, на котором обрывается выписываемый ряд геометрического распределения
+GEOMETRIC_EPSILON = 1e-9
+# Отрезок p, на котором рассматривается геометрическое распределение
+GEOMETRIC_P_RANGE = (0.001, 0.999)
+# Ограничения кэша результатов: число записей и суммарный объем в байтах
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Поверхность H(n, p): число точек сетки p на [0, 1] и число строк n в одном задании
+SURFACE_P_POINTS = 1001
+SURFACE_ROWS_PER_JOB = 64
+# Размер блока при чтении эмпирического распределения: число значений и байт текста
+EMPIRICAL_CHUNK_ELEMENTS = 1 << 20
+EMPIRICAL_TEXT_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Столбцы CSV пакетного режима (строка run_job; у ошибочного задания заполнены первые три и error)
+BATCH_FIELDS = ['job', 'distribution', 'params', 'support', 'prob_sum', 'mode', 'mode_prob',
+                'H', 'argmax', 'max_H', 'evaluations', 'seconds', 'error']
+
+def estimate_size(value):
+    """Примерный объем значения в памяти, в байтах"""
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """
+    LRU-кэш вероятностных схем, энтропий и кривых H.
+    Ключ - имя функции и ее параметры. Размер ограничен числом записей
+    и суммарным объемом; при заданном файле кэш сохраняется на диск.
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.path = None
+    
+    def get(self, key):
+        """Возвращает (найдено ли значение, значение)"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key][0]
+        self.misses += 1
+        return False, None
+    
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.total_bytes += size
+        
+        # Вытеснение давно не использованных записей
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+    
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+    
+    def load(self, path):
+        """Подключение файла кэша: записи из него загружаются, если файл уже есть"""
+        self.path = path
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                for key, value in pickle.load(file):
+                    self.put(key, value)
+    
+    def save(self):
+        if self.path is None:
+            return
+        with open(self.path, 'wb') as file:
+            pickle.dump([(key, value) for key, (value, _) in self.entries.items()], file)
+    
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
+
+CACHE = ResultCache()
+
+def cached(func):
+    """Декоратор: результат функции берется из CACHE по имени функции и параметрам"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__,) + args + tuple(sorted(kwargs.items()))
+        found, value = CACHE.get(key)
+        if not found:
+            value = func(*args, **kwargs)
+            CACHE.put(key, value)
+        return value
+    return wrapper
+
+def neumaier_add(total, compensation, value):
+    """Шаг компенсированного суммирования Ноймайера: возвращает (сумма, поправка)"""
+    new_total = total + value
+    if abs(total) >= abs(value):
+        compensation += (total - new_total) + value
+    else:
+        compensation += (value - new_total) + total
+    return new_total, compensation
+
+class EntropyAccumulator:
+    """
+    Потоковое вычисление энтропии по вероятностям или по абсолютным частотам.
+    Накапливаются N = Σ c и S = Σ c·log₂ c с компенсированным суммированием,
+    нормировка выполняется в конце: H = log₂ N - S / N.
+    Аккумуляторы, заполненные по частям, можно объединять через merge.
+    """
+    def __init__(self):
+        self.total = 0.0
+        self.total_compensation = 0.0
+        self.c_log_c = 0.0
+        self.c_log_c_compensation = 0.0
+    
+    def update(self, values):
+        """Добавление итерируемой последовательности вероятностей или частот"""
+        total, total_comp = self.total, self.total_compensation
+        c_log_c, c_log_c_comp = self.c_log_c, self.c_log_c_compensation
+        for value in values:
+            if value > 0:
+                total, total_comp = neumaier_add(total, total_comp, value)
+                c_log_c, c_log_c_comp = neumaier_add(c_log_c, c_log_c_comp, value * math.log2(value))
+        self.total, self.total_compensation = total, total_comp
+        self.c_log_c, self.c_log_c_compensation = c_log_c, c_log_c_comp
+        return self
+    
+    def update_array(self, values):
+        """
+        Добавление блока значений в виде массива numpy: суммы по блоку
+        считаются векторно и добавляются к накопленным с компенсацией.
+        """
+        import numpy as np
+        
+        values = values[values > 0]
+        self.total, self.total_compensation = neumaier_add(
+            self.total, self.total_compensation, float(np.sum(values)))
+        self.c_log_c, self.c_log_c_compensation = neumaier_add(
+            self.c_log_c, self.c_log_c_compensation, float(np.dot(values, np.log2(values))))
+        return self
+    
+    def merge(self, other):
+        """Объединение с аккумулятором, заполненным по другой части данных"""
+        for value in (other.total, other.total_compensation):
+            self.total, self.total_compensation = neumaier_add(self.total, self.total_compensation, value)
+        for value in (other.c_log_c, other.c_log_c_compensation):
+            self.c_log_c, self.c_log_c_compensation = neumaier_add(self.c_log_c, self.c_log_c_compensation, value)
+        return self
+    
+    def sum(self):
+        """N = Σ c"""
+        return self.total + self.total_compensation
+    
+    def sum_c_log_c(self):
+        """S = Σ c·log₂ c"""
+        return self.c_log_c + self.c_log_c_compensation
+    
+    def entropy(self):
+        """Энтропия нормированного распределения: H = log₂ N - S / N"""
+        total = self.sum()
+        if total <= 0:
+            return 0.0
+        return math.log2(total) - self.sum_c_log_c() / total
 
 def calculate_entropy(probabilities):
     """
     Вычисление энтропии по формуле Шеннона.
     Формула: H(X) = -∑ p_i * log2(p_i)
+    Вероятности не нормируются, поэтому для усеченного ряда
+    результат совпадает с частичной суммой.
+    """
+    return -EntropyAccumulator().update(probabilities).sum_c_log_c() + 0.0
+
+def geometric_entropy(p):
+    """
+    Энтропия геометрического распределения в замкнутом виде.
+    Формула: H(p) = -[(1-p)·log2(1-p) + p·log2(p)] / p
+    Принимает как одно значение p, так и массив значений.
+    """
+    import numpy as np
+    
+    p = np.asarray(p, dtype=float)
+    q = 1 - p
+    q_log_q = np.where(q > 0, q * np.log2(np.where(q > 0, q, 1.0)), 0.0)
+    return -(q_log_q + p * np.log2(p)) / p + 0.0
+
+@cached
+def geometric_pmf(p, epsilon=GEOMETRIC_EPSILON):
+    """
+    Усеченная вероятностная схема геометрического распределения.
+    Члены P(k) = (1-p)^(k-1) * p выписываются, пока P(k) не меньше epsilon.
+    """
+    probs = []
+    k = 1
+    while True:
+        prob = (1 - p) ** (k - 1) * p
+        if prob < epsilon:
+            break
+        probs.append(prob)
+        k += 1
+    return probs
+
+def geometric_truncation_error(p, terms):
+    """
+    Погрешность энтропии, вычисленной по первым terms членам ряда.
+    Хвост P(k), k > K, равен q^K·P(k-K), откуда
+    H - H_K = q^K · (H(p) - K·log2 q),   q = 1 - p.
+    Возвращает (массу хвоста q^K, погрешность энтропии).
+    """
+    q = 1 - p
+    if q <= 0:
+        return 0.0, 0.0
+    tail_mass = q ** terms
+    return tail_mass, tail_mass * (float(geometric_entropy(p)) - terms * math.log2(q))
+
+def binomial_log_comb(n):
+    """
+    Логарифмы биномиальных коэффициентов для k = 0..n через логарифм гамма-функции.
+    Формула: ln C(n,k) = lnΓ(n+1) - lnΓ(k+1) - lnΓ(n-k+1)
+    """
+    import numpy as np
+    
+    log_fact = np.array([math.lgamma(k + 1) for k in range(n + 1)])
+    return log_fact[n] - log_fact - log_fact[::-1]
+
+@cached
+def binomial_pmf(n, p):
+    """
+    Вероятностная схема биномиального распределения в логарифмической области.
+    Формула: ln P(k) = ln C(n,k) + k·ln p + (n-k)·ln(1-p)
+    """
+    import numpy as np
+    
+    k = np.arange(n + 1)
+    if p <= 0.0 or p >= 1.0:
+        probs = np.zeros(n + 1)
+        probs[0 if p <= 0.0 else n] = 1.0
+        return probs
+    log_probs = binomial_log_comb(n) + k * math.log(p) + (n - k) * math.log1p(-p)
+    return np.exp(log_probs)
+
+def binomial_entropy_curve(n, p_values, chunk_elements=SWEEP_CHUNK_ELEMENTS, log_comb=None):
+    """
+    Энтропия биномиального распределения сразу для массива значений p.
+    Формула: H(p) = -∑ P(k) * log2 P(k), где ln P(k) считается через lnΓ.
+    Матрица p×k обрабатывается блоками по строкам, а по k берется только окно
+    mean ± 40σ, за пределами которого P(k) < e^-800 и исчезает в double.
+    Возвращает массивы (p_values, H_values), пригодные для построения графика.
+    """
+    import numpy as np
+    
+    p_values = np.asarray(p_values, dtype=float)
+    H_values = np.zeros(p_values.shape)
+    if log_comb is None:
+        log_comb = binomial_log_comb(n)
+    
+    # При p = 0 и p = 1 распределение вырождено и H = 0
+    interior = np.flatnonzero((p_values > 0.0) & (p_values < 1.0))
+    rows = max(1, chunk_elements // (n + 1))
+    
+    for start in range(0, len(interior), rows):
+        idx = interior[start:start + rows]
+        p = p_values[idx]
+        
+        # Окно значимых k для всего блока
+        sigma = np.sqrt(n * p * (1 - p))
+        k_low = max(0, int(np.floor(np.min(n * p - 40 * sigma - 40))))
+        k_high = min(n, int(np.ceil(np.max(n * p + 40 * sigma + 40))))
+        k = np.arange(k_low, k_high + 1)
+        
+        log_probs = (log_comb[k_low:k_high + 1]
+                     + np.outer(np.log(p), k)
+                     + np.outer(np.log1p(-p), n - k))
+        probs = np.exp(log_probs)
+        H_values[idx] = -np.sum(probs * log_probs, axis=1) / math.log(2)
+    
+    return p_values, H_values
+
+@cached
+def hypergeometric_pmf(n, m, k):
+    """
+    Вероятностная схема гипергеометрического распределения по рекуррентному соотношению.
+    Формула: P(i+1) / P(i) = (k-i)(m-i) / ((i+1)(n-k-m+i+1))
+    Счет ведется от моды в обе стороны, поэтому отношения не превосходят 1
+    и не переполняются, а в конце схема нормируется.
+    Возвращает (наименьшее допустимое i, массив P(i)).
+    """
+    import numpy as np
+    
+    low = max(0, m - (n - k))
+    high = min(k, m)
+    mode = min(max((m + 1) * (k + 1) // (n + 2), low), high)
+    
+    # Отношения P(i+1)/P(i) справа от моды и P(i-1)/P(i) слева от нее
+    i_up = np.arange(mode, high, dtype=float)
+    ratio_up = (k - i_up) * (m - i_up) / ((i_up + 1) * (n - k - m + i_up + 1))
+    i_down = np.arange(mode, low, -1, dtype=float)
+    ratio_down = i_down * (n - k - m + i_down) / ((k - i_down + 1) * (m - i_down + 1))
+    
+    probs = np.concatenate((np.cumprod(ratio_down)[::-1], [1.0], np.cumprod(ratio_up)))
+    return low, probs / np.sum(probs)
+
+@cached
+def hypergeometric_entropy_curve(n, m, chunk_elements=SWEEP_CHUNK_ELEMENTS // 16):
+    """
+    Энтропия гипергеометрического распределения для всех k = 0..n за один проход.
+    ln P(i) = ln C(k,i) + ln C(n-k,m-i) - ln C(n,m), логарифмы факториалов
+    берутся из таблицы lnΓ, построенной один раз, а по i берется окно mean ± 10(σ+1).
+    Используется симметрия H(k) = H(n-k), поэтому считается только половина k.
+    Возвращает массивы (k_values, H_values).
+    """
+    import numpy as np
+    
+    spread = 10
+    # Слева таблица дополнена большими значениями: индексы вне носителя
+    # попадают на них и дают P(i) = 0 без отдельной маски
+    pad = m + 1
+    log_fact = np.empty(n + 1 + pad)
+    log_fact[:pad] = 1e30
+    log_fact[pad:] = np.fromiter((math.lgamma(x + 1) for x in range(n + 1)), dtype=float, count=n + 1)
+    log_fact_reversed = log_fact[::-1].copy()
+    
+    H_values = np.zeros(n + 1)
+    half = n // 2 + 1
+    sigma_max = math.sqrt(m * 0.25 * (n - m) / max(n - 1, 1))
+    rows = max(1, chunk_elements // min(m + 1, int(2 * spread * (sigma_max + 1)) + 1))
+    
+    for k_first in range(0, half, rows):
+        k = np.arange(k_first, min(half, k_first + rows))
+        count = len(k)
+        
+        # Окно значимых i для всего блока
+        frac = k / max(n, 1)
+        mean = m * frac
+        sigma = np.sqrt(m * frac * (1 - frac) * (n - m) / max(n - 1, 1))
+        i_low = max(0, int(np.floor(np.min(mean - spread * (sigma + 1)))))
+        i_high = min(m, int(np.ceil(np.max(mean + spread * (sigma + 1)))))
+        # Столбцы идут по убыванию i, чтобы оба окна шли по таблицам вперед
+        i = np.arange(i_high, i_low - 1, -1)
+        width = len(i)
+        
+        # ln(k-i)! и ln(n-k-m+i)! как скользящие окна по таблице и по ее
+        # перевернутой копии, без копирования
+        start = pad + k_first - i_high
+        first = np.lib.stride_tricks.sliding_window_view(
+            log_fact[start:start + count + width - 1], width)
+        start = len(log_fact) - 1 - pad - (n - m - k_first + i_high)
+        second = np.lib.stride_tricks.sliding_window_view(
+            log_fact_reversed[start:start + count + width - 1], width)
+        
+        # ln P(i) = ln k! + ln(n-k)! + ln m! + ln(n-m)! - ln n!
+        #           - ln i! - ln(m-i)! - ln(k-i)! - ln(n-k-m+i)!
+        log_probs = np.add(first, second)
+        log_probs += log_fact[pad + i] + log_fact[pad + m - i]
+        row_const = log_fact[pad + k] + log_fact[pad + n - k] \
+                    + (log_fact[pad + m] + log_fact[pad + n - m] - log_fact[pad + n])
+        np.subtract(row_const[:, None], log_probs, out=log_probs)
+        probs = np.exp(log_probs)
+        
+        # Нормировка строки гасит погрешность больших lnΓ:
+        # H = ln S - Σ P·ln P / S, где S = Σ P
+        total = probs @ np.ones(width)
+        H_values[k] = (np.log(total) - np.einsum('ij,ij->i', probs, log_probs) / total) / math.log(2)
+    
+    H_values[half:] = H_values[n - half::-1][:n + 1 - half]
+    return np.arange(n + 1), H_values
+
+def golden_section_maximum(func, low, high, tol=MAXIMUM_TOLERANCE):
+    """
+    Поиск максимума унимодальной функции на отрезке [low, high] методом золотого сечения.
+    Отрезок сжимается в φ ≈ 1.618 раза на каждом шаге, поэтому для tol = 1e-8
+    на единичном отрезке хватает около 40 вычислений функции.
+    Возвращает (x, func(x), число вычислений).
+    """
+    ratio = (math.sqrt(5) - 1) / 2
+    x1 = high - ratio * (high - low)
+    x2 = low + ratio * (high - low)
+    f1 = func(x1)
+    f2 = func(x2)
+    evaluations = 2
+    
+    while high - low > tol:
+        if f1 >= f2:
+            high, x2, f2 = x2, x1, f1
+            x1 = high - ratio * (high - low)
+            f1 = func(x1)
+        else:
+            low, x1, f1 = x1, x2, f2
+            x2 = low + ratio * (high - low)
+            f2 = func(x2)
+        evaluations += 1
+    
+    x = (low + high) / 2
+    return x, func(x), evaluations + 1
+
+def ternary_search_maximum(func, low, high):
+    """
+    Поиск максимума унимодальной функции целого аргумента на [low, high] тернарным поиском.
+    Возвращает (x, func(x), число вычислений).
+    """
+    evaluations = 0
+    while high - low > 2:
+        third = (high - low) // 3
+        m1 = low + third
+        m2 = high - third
+        if func(m1) < func(m2):
+            low = m1 + 1
+        else:
+            high = m2
+        evaluations += 2
+    
+    best_x = max(range(low, high + 1), key=func)
+    return best_x, func(best_x), evaluations + (high - low + 1) + 1
+
+@cached
+def binomial_entropy_maximum(n, tol=MAXIMUM_TOLERANCE):
+    """
+    Максимум энтропии биномиального распределения по p для заданного n.
+    Возвращает (p, H(p), число вычислений).
+    """
+    log_comb = binomial_log_comb(n)
+    
+    def entropy(p):
+        return binomial_entropy_curve(n, [p], log_comb=log_comb)[1][0]
+    
+    return golden_section_maximum(entropy, 0.0, 1.0, tol)
+
+@cached
+def geometric_entropy_maximum(low, high, tol=MAXIMUM_TOLERANCE):
+    """
+    Максимум энтропии геометрического распределения по p на отрезке [low, high].
+    Возвращает (p, H(p), число вычислений).
+    """
+    return golden_section_maximum(lambda p: float(geometric_entropy(p)), low, high, tol)
+
+@cached
+def hypergeometric_entropy(n, m, k):
+    """Энтропия гипергеометрического распределения для одного значения k"""
+    return calculate_entropy(hypergeometric_pmf(n, m, k)[1])
+
+@cached
+def hypergeometric_entropy_maximum(n, m):
+    """
+    Максимум энтропии гипергеометрического распределения по k = 0..n.
+    Возвращает (k, H(k), число вычислений).
+    """
+    return ternary_search_maximum(lambda k: hypergeometric_entropy(n, m, k), 0, n)
+
+@cached
+def binomial_plot_curve(n):
+    """Энтропия биномиального распределения на грубой сетке p для графика"""
+    import numpy as np
+    
+    return binomial_entropy_curve(n, np.linspace(0.0, 1.0, PLOT_POINTS + 1))
+
+@cached
+def geometric_plot_curve():
+    """Энтропия геометрического распределения на грубой сетке p для графика"""
+    import numpy as np
+    
+    p_values = np.linspace(*GEOMETRIC_P_RANGE, PLOT_POINTS)
+    return p_values, geometric_entropy(p_values)
+
+@cached
+def hypergeometric_plot_curve(n, m):
     """
-    entropy = 0.0
-    for prob in probabilities:
-        if prob > 0:
-            entropy -= prob * math.log2(prob)
-    return entropy
+    Энтропия гипергеометрического распределения на грубой сетке k для графика.
+    При n не больше HYPERGEOMETRIC_SWEEP_LIMIT значения берутся из одного прохода
+    hypergeometric_entropy_curve по всем k, иначе каждая точка сетки считается отдельно.
+    """
+    import numpy as np
+    
+    k_values = np.unique(np.linspace(0, n, PLOT_POINTS + 1).round().astype(int))
+    if n <= HYPERGEOMETRIC_SWEEP_LIMIT:
+        return k_values, list(hypergeometric_entropy_curve(n, m)[1][k_values])
+    return k_values, [hypergeometric_entropy(n, m, k) for k in k_values]
+
+def hypergeometric_minima(k_values, H_values):
+    """Точки минимума на краях интервала, если энтропия в них нулевая"""
+    minima = []
+    if H_values[0] == 0:
+        minima.append((k_values[0], H_values[0]))
+    if H_values[-1] == 0:
+        minima.append((k_values[-1], H_values[-1]))
+    return minima
+
+def plot_entropy_curve(x_values, H_values, maximum, minima, labels, filename=None):
+    """
+    График энтропии с отмеченными максимумом и минимумами.
+    labels = (подпись кривой, подпись оси x, подпись оси y, заголовок).
+    Если задано имя файла, график сохраняется в PNG, иначе выводится на экран.
+    """
+    import matplotlib
+    if filename is not None:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    
+    curve_label, xlabel, ylabel, title = labels
+    plt.figure(figsize=(10, 6))
+    plt.plot(x_values, H_values, label=curve_label)
+    plt.scatter(maximum[0], maximum[1], color='red', label='Максимум')
+    for i, (x, H) in enumerate(minima):
+        plt.scatter(x, H, color='green', label='Минимум' if i == 0 else None)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.legend()
+    plt.grid(True)
+    if filename is None:
+        plt.show()
+    else:
+        plt.savefig(filename)
+        plt.close()
 
 def task1():
     """
@@ -23,13 +560,11 @@ def task1():
     # Построение вероятностной схемы для конкретного p
     print("\nВероятностная схема:")
     print("k\tP(k)")
-    probs_specific = []
+    probs_specific = binomial_pmf(n, p_specific)
     sum_prob = 0.0
     
     for k in range(0, n + 1):
-        comb = math.comb(n, k)
-        prob = comb * (p_specific ** k) * ((1 - p_specific) ** (n - k))
-        probs_specific.append(prob)
+        prob = probs_specific[k]
         sum_prob += prob
         print(f"{k}\t{prob:.6f}")
     
@@ -39,42 +574,16 @@ def task1():
     H_specific = calculate_entropy(probs_specific)
     print(f"Энтропия H(p) для n={n}, p={p_specific}: {H_specific:.6f} бит")
     
-    # Построение графика
-    p_values = []
-    H_values = []
-    
-    for i in range(1000):
-        p = i / 1000.0
-        p_values.append(p)
-        
-        # Формирование вероятностей для каждого k
-        probs = []
-        for k in range(0, n + 1):
-            comb = math.comb(n, k)
-            prob = comb * (p ** k) * ((1 - p) ** (n - k))
-            probs.append(prob)
-        
-        H = calculate_entropy(probs)
-        H_values.append(H)
+    # Грубая сетка для графика
+    p_values, H_values = binomial_plot_curve(n)
     
     # Анализ экстремумов
-    max_H = max(H_values)
-    max_index = H_values.index(max_H)
+    max_p, max_H, evaluations = binomial_entropy_maximum(n)
     
     # Построение графика
-    plt.figure(figsize=(10, 6))
-    plt.plot(p_values, H_values, label='H(p)')
-    plt.scatter(p_values[max_index], H_values[max_index], color='red', label='Максимум')
-    plt.scatter(0, 0, color='green', label='Минимум')
-    plt.scatter(1, 0, color='green')
-    plt.xlabel('Вероятность p')
-    plt.ylabel('Энтропия H(p)')
-    plt.title('Энтропия биномиального распределения')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+    plot_entropy_curve(p_values, H_values, (max_p, max_H), [(0, 0), (1, 0)], BINOMIAL_LABELS)
     
-    print(f"Максимальное значение энтропии: H({p_values[max_index]:.3f}) = {H_values[max_index]:.3f}")
+    print(f"Максимальное значение энтропии: H({max_p:.6f}) = {max_H:.6f} ({evaluations} вычислений)")
     print("Минимальные значения энтропии: H(0) = 0, H(1) = 0")
 
 def task2():
@@ -88,67 +597,32 @@ def task2():
     # Вывод вероятностной схемы для конкретного p
     print("\nВероятностная схема (геометрическое распределение):")
     print("k\tP(k)")
-    probs_specific = []
-    k = 1
+    probs_specific = geometric_pmf(p_specific)
     sum_prob = 0.0
-    epsilon = 1e-9
     
-    while True:
-        prob = (1 - p_specific) ** (k - 1) * p_specific
-        if prob < epsilon:
-            break
-        probs_specific.append(prob)
+    for k, prob in enumerate(probs_specific, 1):
         sum_prob += prob
         print(f"{k}\t{prob:.6f}")
-        k += 1
     
     print(f"Сумма вероятностей: {sum_prob:.6f}")
     
-    # Расчет энтропии для конкретного p
+    # Расчет энтропии для конкретного p по усеченному ряду и точная оценка
     H_specific = calculate_entropy(probs_specific)
-    print(f"Энтропия H(p) для p={p_specific}: {H_specific:.6f} бит")
+    tail_mass, H_error = geometric_truncation_error(p_specific, len(probs_specific))
+    print(f"Энтропия H(p) для p={p_specific} по {len(probs_specific)} членам ряда: {H_specific:.6f} бит")
+    print(f"Погрешность усечения: масса хвоста {tail_mass:.3e}, энтропия {H_error:.3e} бит")
+    print(f"Точная энтропия H(p): {float(geometric_entropy(p_specific)):.6f} бит")
     
-    # Построение графика энтропии в зависимости от p
-    H_values = []
-    p_values = []
-    
-    for i in range(1, 1000):
-        p = i / 1000.0
-        p_values.append(p)
-        
-        # Формирование распределения до достижения малой вероятности
-        probs = []
-        k = 1
-        while True:
-            prob = (1 - p) ** (k - 1) * p
-            if prob < epsilon:
-                break
-            probs.append(prob)
-            k += 1
-        
-        # Нормализация вероятностей
-        sum_probs = sum(probs)
-        normalized_probs = [prob / sum_probs for prob in probs]
-        
-        H = calculate_entropy(normalized_probs)
-        H_values.append(H)
+    # Построение графика энтропии в зависимости от p по замкнутой формуле
+    p_values, H_values = geometric_plot_curve()
     
     # Анализ экстремумов
-    max_H = max(H_values)
-    max_index = H_values.index(max_H)
+    max_p, max_H, evaluations = geometric_entropy_maximum(*GEOMETRIC_P_RANGE)
     
     # Построение графика
-    plt.figure(figsize=(10, 6))
-    plt.plot(p_values, H_values, label='H(p)')
-    plt.scatter(p_values[max_index], H_values[max_index], color='red', label='Максимум')
-    plt.xlabel('Вероятность p')
-    plt.ylabel('Энтропия H(p)')
-    plt.title('Энтропия геометрического распределения')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+    plot_entropy_curve(p_values, H_values, (max_p, max_H), [], GEOMETRIC_LABELS)
     
-    print(f"Максимальное значение энтропии: H({p_values[max_index]:.3f}) = {H_values[max_index]:.3f}")
+    print(f"Максимальное значение энтропии: H({max_p:.6f}) = {max_H:.6f} ({evaluations} вычислений)")
     print("Энтропия стремится к 0 при p -> 0+ и p -> 1-")
 
 def task3():
@@ -164,21 +638,13 @@ def task3():
     print(f"\nВероятностная схема (гипергеометрическое распределение) для n={n}, m={m}, k={k_specific}:")
     print("i\tP(i)")
     
-    # Определение допустимых значений i
-    low = max(0, m - (n - k_specific))
-    high = min(k_specific, m)
-    
-    # Вычисление вероятностей для каждого i
-    probs_specific = []
+    # Вычисление вероятностей для каждого допустимого i
+    low, probs_specific = hypergeometric_pmf(n, m, k_specific)
     sum_prob = 0.0
     
-    for i in range(low, high + 1):
-        numerator = math.comb(k_specific, i) * math.comb(n - k_specific, m - i)
-        denominator = math.comb(n, m)
-        prob = numerator / denominator
-        probs_specific.append(prob)
+    for offset, prob in enumerate(probs_specific):
         sum_prob += prob
-        print(f"{i}\t{prob:.6f}")
+        print(f"{low + offset}\t{prob:.6f}")
     
     print(f"Сумма вероятностей: {sum_prob:.6f}")
     
@@ -186,62 +652,408 @@ def task3():
     H_specific = calculate_entropy(probs_specific)
     print(f"Энтропия H(k) для k={k_specific}: {H_specific:.6f} бит")
     
-    # Построение графика энтропии в зависимости от k
-    H_values = []
-    k_values = list(range(0, n + 1))
+    # Построение графика энтропии в зависимости от k по грубой сетке
+    k_values, H_values = hypergeometric_plot_curve(n, m)
+    
+    # Анализ экстремумов
+    max_k, max_H, evaluations = hypergeometric_entropy_maximum(n, m)
+    
+    # Построение графика
+    plot_entropy_curve(k_values, H_values, (max_k, max_H),
+                       hypergeometric_minima(k_values, H_values), HYPERGEOMETRIC_LABELS)
+    
+    print(f"Максимальное значение энтропии: H({max_k}) = {max_H:.6f} ({evaluations} вычислений)")
+    print("Минимальные значения энтропии достигаются на краях интервала")
+
+def job_parameters_error(distribution, params):
+    """Описание ошибки в параметрах задания или None, если параметры допустимы"""
+    if distribution == 'binomial':
+        n, p = params
+        if n < 0:
+            return "n должно быть неотрицательным"
+        if not 0.0 <= p <= 1.0:
+            return "p должно быть от 0 до 1"
+    elif distribution == 'geometric':
+        p, = params
+        if not 0.0 < p <= 1.0:
+            return "p должно быть больше 0 и не больше 1"
+    else:
+        n, m, k = params
+        if not 0 <= m <= n:
+            return "должно быть 0 ≤ m ≤ n"
+        if not 0 <= k <= n:
+            return "должно быть 0 ≤ k ≤ n"
+    return None
+
+def parse_jobs(filename):
+    """
+    Чтение заданий пакетного режима: одна строка - одно задание,
+    параметры в том же порядке, что и в диалоге задач:
+      binomial n p
+      geometric p
+      hypergeometric n m k
+    Пустые строки и строки, начинающиеся с #, пропускаются.
+    Возвращает список (распределение, параметры, ошибка). Для неверной строки или
+    недопустимых параметров (вне 0 ≤ p ≤ 1, 0 < p ≤ 1 для геометрического,
+    0 ≤ m ≤ n, 0 ≤ k ≤ n) ошибка — описание с номером строки, иначе None.
+    """
+    jobs = []
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            distribution = fields[0].lower()
+            try:
+                if distribution == 'binomial' and len(fields) == 3:
+                    params = (int(fields[1]), float(fields[2]))
+                elif distribution == 'geometric' and len(fields) == 2:
+                    params = (float(fields[1]),)
+                elif distribution == 'hypergeometric' and len(fields) == 4:
+                    params = (int(fields[1]), int(fields[2]), int(fields[3]))
+                else:
+                    raise ValueError
+            except ValueError:
+                jobs.append((distribution, tuple(fields[1:]),
+                             f"Строка {line_number}: неверное задание '{line.strip()}'"))
+                continue
+            error = job_parameters_error(distribution, params)
+            if error is not None:
+                error = f"Строка {line_number}: {error}"
+            jobs.append((distribution, params, error))
+    return jobs
+
+def batch_error_row(job_id, distribution, params, error):
+    """Строка результата пакетного режима для задания, которое не удалось выполнить"""
+    return {
+        'job': job_id,
+        'distribution': distribution,
+        'params': ' '.join(str(value) for value in params),
+        'error': error,
+    }
+
+def completed_jobs(futures):
+    """Результаты заданий по мере готовности; исключение задания превращается в строку с error"""
+    from concurrent.futures import as_completed
+    
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as error:
+            yield batch_error_row(*futures[future], f"{type(error).__name__}: {error}")
+
+def run_job(job_id, distribution, params, plot_dir=None):
+    """
+    Расчет одного задания пакетного режима: сводка по вероятностной схеме,
+    энтропия для заданных параметров и максимум энтропии.
+    При заданном каталоге plot_dir график сохраняется в PNG.
+    """
+    import numpy as np
+    
+    start = time.perf_counter()
+    
+    if distribution == 'binomial':
+        n, p = params
+        first, probs = 0, binomial_pmf(n, p)
+        H = calculate_entropy(probs)
+        arg_max, max_H, evaluations = binomial_entropy_maximum(n)
+    elif distribution == 'geometric':
+        p, = params
+        first, probs = 1, geometric_pmf(p)
+        H = float(geometric_entropy(p))
+        arg_max, max_H, evaluations = geometric_entropy_maximum(*GEOMETRIC_P_RANGE)
+    else:
+        n, m, k = params
+        first, probs = hypergeometric_pmf(n, m, k)
+        H = calculate_entropy(probs)
+        arg_max, max_H, evaluations = hypergeometric_entropy_maximum(n, m)
+    
+    # При очень малом p геометрического распределения все члены меньше
+    # GEOMETRIC_EPSILON и усеченная схема пуста: моды у нее нет
+    mode = int(np.argmax(probs)) if len(probs) else None
+    
+    if plot_dir is not None:
+        filename = os.path.join(plot_dir, f"{job_id:05d}_{distribution}.png")
+        if distribution == 'binomial':
+            x_values, H_values = binomial_plot_curve(params[0])
+            plot_entropy_curve(x_values, H_values, (arg_max, max_H), [(0, 0), (1, 0)],
+                               BINOMIAL_LABELS, filename)
+        elif distribution == 'geometric':
+            x_values, H_values = geometric_plot_curve()
+            plot_entropy_curve(x_values, H_values, (arg_max, max_H), [],
+                               GEOMETRIC_LABELS, filename)
+        else:
+            x_values, H_values = hypergeometric_plot_curve(params[0], params[1])
+            plot_entropy_curve(x_values, H_values, (arg_max, max_H),
+                               hypergeometric_minima(x_values, H_values), HYPERGEOMETRIC_LABELS, filename)
+    
+    return {
+        'job': job_id,
+        'distribution': distribution,
+        'params': ' '.join(str(value) for value in params),
+        'support': len(probs),
+        'prob_sum': float(np.sum(probs)),
+        'mode': first + mode if mode is not None else None,
+        'mode_prob': float(probs[mode]) if mode is not None else None,
+        'H': float(H),
+        'argmax': float(arg_max),
+        'max_H': float(max_H),
+        'evaluations': evaluations,
+        'seconds': time.perf_counter() - start,
+        'error': '',
+    }
+
+def run_batch(jobs_file, output_file, plot_dir=None, workers=None):
+    """
+    Пакетный режим без диалога: задания из файла распределяются по пулу процессов,
+    результаты записываются в CSV (или в JSON Lines для .json/.jsonl) по мере готовности.
+    Неверная строка файла или ошибка в одном задании не прерывает пакет:
+    для такого задания пишется строка с полем error.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import chain
+    
+    jobs = parse_jobs(jobs_file)
+    if plot_dir is not None:
+        os.makedirs(plot_dir, exist_ok=True)
+    
+    as_json = output_file.lower().endswith(('.json', '.jsonl'))
+    start = time.perf_counter()
+    failed = 0
     
-    for k in k_values:
-        # Определение допустимых значений i
-        low = max(0, m - (n - k))
-        high = min(k, m)
+    with open(output_file, 'w', encoding='utf-8', newline='') as file, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = None
+        futures = {pool.submit(run_job, job_id, distribution, params, plot_dir): (job_id, distribution, params)
+                   for job_id, (distribution, params, error) in enumerate(jobs) if error is None}
+        # Отклоненные при разборе задания записываются сразу, не дожидаясь пула
+        rejected = (batch_error_row(job_id, distribution, params, error)
+                    for job_id, (distribution, params, error) in enumerate(jobs) if error is not None)
+        
+        for done, result in enumerate(chain(rejected, completed_jobs(futures)), 1):
+            if as_json:
+                file.write(json.dumps(result, ensure_ascii=False) + '\n')
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=BATCH_FIELDS, restval='')
+                    writer.writeheader()
+                writer.writerow(result)
+            file.flush()
+            if result['error']:
+                failed += 1
+                print(f"[{done}/{len(jobs)}] {result['distribution']} {result['params']}: ошибка {result['error']}")
+            else:
+                print(f"[{done}/{len(jobs)}] {result['distribution']} {result['params']}: "
+                      f"H = {result['H']:.6f}, max H({result['argmax']:.6g}) = {result['max_H']:.6f}")
+    
+    elapsed = time.perf_counter() - start
+    print(f"Выполнено заданий: {len(jobs) - failed} из {len(jobs)} за {elapsed:.2f} с "
+          f"({len(jobs) / elapsed:.1f} заданий/с)")
+
+def compute_surface_rows(filename, n_first, n_last):
+    """
+    Строки n_first..n_last поверхности H(n, p): считаются целиком в памяти
+    и записываются в уже созданный файл .npy через отображение в память.
+    """
+    import numpy as np
+    
+    surface = np.load(filename, mmap_mode='r+')
+    p_grid = np.linspace(0.0, 1.0, surface.shape[1])
+    rows = np.empty((n_last - n_first + 1, surface.shape[1]))
+    for n in range(n_first, n_last + 1):
+        rows[n - n_first] = binomial_entropy_curve(n, p_grid)[1]
+    surface[n_first:n_last + 1] = rows
+    surface.flush()
+    return n_first, n_last
+
+def build_entropy_surface(filename, n_max, p_points=SURFACE_P_POINTS, workers=None):
+    """
+    Расчет поверхности энтропии биномиального распределения H(n, p)
+    для n = 0..n_max на равномерной сетке из p_points значений p ∈ [0, 1].
+    Результат - файл .npy, строки n считаются блоками в пуле процессов.
+    """
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    start = time.perf_counter()
+    surface = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float64,
+                                        shape=(n_max + 1, p_points))
+    del surface
+    
+    # Стоимость строки растет с n, поэтому тяжелые блоки отправляются первыми
+    blocks = [(n_first, min(n_max, n_first + SURFACE_ROWS_PER_JOB - 1))
+              for n_first in range(0, n_max + 1, SURFACE_ROWS_PER_JOB)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(compute_surface_rows, filename, n_first, n_last)
+                   for n_first, n_last in reversed(blocks)]
+        for done, future in enumerate(as_completed(futures), 1):
+            n_first, n_last = future.result()
+            print(f"[{done}/{len(blocks)}] n = {n_first}..{n_last}")
+    
+    print(f"Поверхность {n_max + 1}×{p_points} записана в {filename} "
+          f"за {time.perf_counter() - start:.2f} с")
+
+class EntropySurface:
+    """
+    Чтение поверхности H(n, p) из файла .npy без загрузки в память целиком:
+    файл отображается в память, а значение в точке p находится линейной
+    интерполяцией между соседними узлами сетки в строке n.
+    """
+    def __init__(self, filename):
+        import numpy as np
         
-        # Вычисление вероятностей для каждого i
-        probs = []
-        for i in range(low, high + 1):
-            numerator = math.comb(k, i) * math.comb(n - k, m - i)
-            denominator = math.comb(n, m)
-            prob = numerator / denominator
-            probs.append(prob)
+        self.values = np.load(filename, mmap_mode='r')
+        self.n_max = self.values.shape[0] - 1
+        self.p_step = 1.0 / (self.values.shape[1] - 1)
+    
+    def entropy(self, n, p):
+        if not 0 <= n <= self.n_max:
+            raise ValueError(f"n должно быть от 0 до {self.n_max}")
+        if not 0.0 <= p <= 1.0:
+            raise ValueError("p должно быть от 0 до 1")
         
-        H = calculate_entropy(probs)
-        H_values.append(H)
+        position = p / self.p_step
+        j = min(int(position), self.values.shape[1] - 2)
+        weight = position - j
+        row = self.values[n]
+        return float((1 - weight) * row[j] + weight * row[j + 1])
+
+def query_entropy_surface(filename, n, p):
+    """Поиск H(n, p) по поверхности с замером времени одного запроса"""
+    surface = EntropySurface(filename)
+    start = time.perf_counter()
+    H = surface.entropy(n, p)
+    elapsed = time.perf_counter() - start
+    print(f"H(n={n}, p={p}) = {H:.6f} бит (поиск за {elapsed * 1e6:.1f} мкс)")
+
+def iter_numeric_chunks(filename, dtype=None):
+    """
+    Чтение числового файла блоками массивов numpy без создания списков Python.
+    .npy и двоичные файлы с заданным dtype (например, uint32 или float64)
+    отображаются в память, текстовые файлы (числа через пробелы или по строкам)
+    читаются блоками по EMPIRICAL_TEXT_CHUNK_BYTES байтов, даже если это одна строка.
+    """
+    import numpy as np
     
-    # Анализ экстремумов
-    max_H = max(H_values)
-    max_index = H_values.index(max_H)
+    if dtype is not None or filename.endswith('.npy'):
+        if filename.endswith('.npy'):
+            data = np.load(filename, mmap_mode='r').reshape(-1)
+        else:
+            data = np.memmap(filename, dtype=dtype, mode='r')
+        for start in range(0, len(data), EMPIRICAL_CHUNK_ELEMENTS):
+            yield np.asarray(data[start:start + EMPIRICAL_CHUNK_ELEMENTS], dtype=float)
+        return
     
-    # Построение графика
-    plt.figure(figsize=(10, 6))
-    plt.plot(k_values, H_values, label='H(k)')
-    plt.scatter(k_values[max_index], H_values[max_index], color='red', label='Максимум')
+    with open(filename, 'rb') as file:
+        carry = b''
+        while True:
+            data = file.read(EMPIRICAL_TEXT_CHUNK_BYTES)
+            if not data:
+                break
+            data = carry + data
+            # Блок режется по последнему пробельному символу, неполное число
+            # в конце переносится в следующий блок
+            cut = max(data.rfind(space) for space in (b' ', b'\n', b'\t', b'\r'))
+            if cut < 0:
+                carry = data
+                continue
+            carry = data[cut + 1:]
+            yield np.fromstring(data[:cut + 1].decode('ascii'), dtype=float, sep=' ')
+        if carry:
+            yield np.fromstring(carry.decode('ascii'), dtype=float, sep=' ')
+
+def empirical_entropy(filename, dtype=None):
+    """
+    Энтропия эмпирического распределения из файла частот или вероятностей.
+    Формулы: H = log₂ N - Σ c·log₂ c / N,  Hmax = log₂ m,  D = 1 - H / Hmax,
+    где m - число ячеек в файле.
+    """
+    import numpy as np
     
-    # Добавляем точки минимума
-    if H_values[0] == 0:
-        plt.scatter(k_values[0], H_values[0], color='green', label='Минимум')
-    if H_values[-1] == 0:
-        plt.scatter(k_values[-1], H_values[-1], color='green')
+    start = time.perf_counter()
+    accumulator = EntropyAccumulator()
+    bins = 0
+    nonzero = 0
     
-    plt.xlabel('Количество стандартных изделий k')
-    plt.ylabel('Энтропия H(k)')
-    plt.title('Энтропия гипергеометрического распределения')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+    for chunk in iter_numeric_chunks(filename, dtype):
+        if np.any(chunk < 0):
+            raise ValueError("Частоты и вероятности не могут быть отрицательными")
+        accumulator.update_array(chunk)
+        bins += len(chunk)
+        nonzero += int(np.count_nonzero(chunk))
     
-    print(f"Максимальное значение энтропии: H({k_values[max_index]}) = {H_values[max_index]:.3f}")
-    print("Минимальные значения энтропии достигаются на краях интервала")
+    elapsed = time.perf_counter() - start
+    H = accumulator.entropy()
+    H_max = math.log2(bins) if bins > 0 else 0.0
+    redundancy = 1 - H / H_max if H_max > 0 else 0.0
+    
+    return {
+        'bins': bins,
+        'nonzero': nonzero,
+        'sum': accumulator.sum(),
+        'H': H,
+        'H_max': H_max,
+        'redundancy': redundancy,
+        'seconds': elapsed,
+        'bytes': os.path.getsize(filename),
+    }
+
+def report_empirical_entropy(filename, dtype=None):
+    """Вывод энтропии, максимальной энтропии и избыточности для файла частот"""
+    result = empirical_entropy(filename, dtype)
+    seconds = max(result['seconds'], 1e-9)
+    print(f"Файл: {filename}")
+    print(f"Число ячеек: {result['bins']} (ненулевых: {result['nonzero']})")
+    print(f"Сумма значений N: {result['sum']:.6f}")
+    print(f"Энтропия H: {result['H']:.6f} бит")
+    print(f"Максимальная энтропия Hmax = log₂ m: {result['H_max']:.6f} бит")
+    print(f"Избыточность D = 1 - H / Hmax: {result['redundancy']:.6f}")
+    print(f"Время: {result['seconds']:.3f} с, {result['bins'] / seconds / 1e6:.1f} млн ячеек/с, "
+          f"{result['bytes'] / seconds / 2**20:.1f} МБ/с")
 
 def main():
     """
     Основное меню для выбора задачи
     """
+    if len(sys.argv) > 1:
+        if sys.argv[1].lower() == "batch" and len(sys.argv) in (4, 5):
+            # Пакетный режим
+            run_batch(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) == 5 else None)
+            return
+        elif sys.argv[1:3] == ["surface", "build"] and len(sys.argv) in (5, 6):
+            # Расчет поверхности H(n, p)
+            p_points = int(sys.argv[5]) if len(sys.argv) == 6 else SURFACE_P_POINTS
+            build_entropy_surface(sys.argv[3], int(sys.argv[4]), p_points)
+            return
+        elif sys.argv[1:3] == ["surface", "query"] and len(sys.argv) == 6:
+            # Поиск по готовой поверхности H(n, p)
+            query_entropy_surface(sys.argv[3], int(sys.argv[4]), float(sys.argv[5]))
+            return
+        elif sys.argv[1].lower() == "empirical" and len(sys.argv) in (3, 4):
+            # Энтропия эмпирического распределения из файла
+            report_empirical_entropy(sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else None)
+            return
+        elif sys.argv[1].lower() == "cache" and len(sys.argv) == 3:
+            # Диалоговый режим с кэшем, сохраняемым на диск
+            CACHE.load(sys.argv[2])
+        else:
+            print("Использование:")
+            print("  python main.py                                    - диалоговый режим")
+            print("  python main.py cache entropy_cache.pkl            - диалоговый режим с кэшем на диске")
+            print("  python main.py batch jobs.txt results.csv [plots] - пакетный режим")
+            print("  python main.py surface build surface.npy n_max [p_points] - расчет H(n, p)")
+            print("  python main.py surface query surface.npy n p      - поиск H(n, p)")
+            print("  python main.py empirical counts.txt|counts.npy|counts.bin [dtype] - энтропия из файла")
+            return
+    
     while True:
         print("\nВыберите задачу:")
         print("1. Биномиальное распределение")
         print("2. Геометрическое распределение")
         print("3. Гипергеометрическое распределение")
-        print("4. Выход")
-        choice = input("Ваш выбор (1-4): ")
+        print("4. Статистика кэша")
+        print("5. Выход")
+        choice = input("Ваш выбор (1-5): ")
 
         if choice == '1':
             task1()
@@ -250,9 +1062,15 @@ def main():
         elif choice == '3':
             task3()
         elif choice == '4':
+            stats = CACHE.stats()
+            print(f"Записей: {stats['entries']}, объем: {stats['bytes'] / 1024:.1f} КБ")
+            print(f"Попаданий: {stats['hits']}, промахов: {stats['misses']}, "
+                  f"доля попаданий: {stats['hit_rate']:.1%}")
+        elif choice == '5':
+            CACHE.save()
             break
         else:
-            print("Неверный ввод. Пожалуйста, выберите 1-4.")
+            print("Неверный ввод. Пожалуйста, выберите 1-5.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,114 +1,1169 @@
+import codecs
+import csv
+import glob
+import hashlib
+import heapq
+import io
+import json
 import math
+import mmap
+import os
+import pickle
+import re
+import sys
+import time
+
+# Размер блока при потоковом чтении файла, в символах
+CHUNK_SIZE = 1 << 20
+# Наибольший размер алфавита, при котором частоты пар хранятся плотной матрицей
+DENSE_ALPHABET_LIMIT = 1024
+# Основание ключей пар в разреженном режиме: больше любого кода символа
+SPARSE_KEY_BASE = 1 << 21
+
+# Наибольший порядок блоков для энтропий H(X₁..Xₖ) по умолчанию
+MAX_BLOCK_ORDER = 6
+
+# Множитель полиномиального хеша k-грамм (арифметика по модулю 2⁶⁴)
+BLOCK_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Окно (в символах) и период вывода монитора энтропии по умолчанию
+MONITOR_WINDOW = 1 << 16
+MONITOR_CADENCE = 1 << 14
+
+# Пауза перед повторным чтением растущего файла, в секундах
+FOLLOW_INTERVAL = 0.2
+
+# Индекс частот хранится рядом с файлом: имя файла + суффикс
+INDEX_SUFFIX = '.lab2index'
+INDEX_VERSION = 1
+
+# Размер буфера записи таблиц частот в файл
+EXPORT_BUFFER_SIZE = 1 << 20
+
+def neumaier_add(total, compensation, value):
+    """Шаг компенсированного суммирования Ноймайера: возвращает (сумма, поправка)"""
+    new_total = total + value
+    if abs(total) >= abs(value):
+        compensation += (total - new_total) + value
+    else:
+        compensation += (value - new_total) + total
+    return new_total, compensation
+
+class EntropyAccumulator:
+    """
+    Потоковое вычисление энтропии по вероятностям или по абсолютным частотам.
+    Накапливаются N = Σ c и S = Σ c·log₂ c с компенсированным суммированием,
+    нормировка выполняется в конце: H = log₂ N - S / N.
+    Аккумуляторы, заполненные по частям, можно объединять через merge.
+    """
+    def __init__(self):
+        self.total = 0.0
+        self.total_compensation = 0.0
+        self.c_log_c = 0.0
+        self.c_log_c_compensation = 0.0
+    
+    def update(self, values):
+        """Добавление итерируемой последовательности вероятностей или частот"""
+        total, total_comp = self.total, self.total_compensation
+        c_log_c, c_log_c_comp = self.c_log_c, self.c_log_c_compensation
+        for value in values:
+            if value > 0:
+                total, total_comp = neumaier_add(total, total_comp, value)
+                c_log_c, c_log_c_comp = neumaier_add(c_log_c, c_log_c_comp, value * math.log2(value))
+        self.total, self.total_compensation = total, total_comp
+        self.c_log_c, self.c_log_c_compensation = c_log_c, c_log_c_comp
+        return self
+    
+    def update_array(self, values):
+        """
+        Добавление блока значений в виде массива numpy: суммы по блоку
+        считаются векторно и добавляются к накопленным с компенсацией.
+        """
+        import numpy as np
+        
+        values = values[values > 0].astype(float)
+        self.total, self.total_compensation = neumaier_add(
+            self.total, self.total_compensation, float(np.sum(values)))
+        self.c_log_c, self.c_log_c_compensation = neumaier_add(
+            self.c_log_c, self.c_log_c_compensation, float(np.dot(values, np.log2(values))))
+        return self
+    
+    def merge(self, other):
+        """Объединение с аккумулятором, заполненным по другой части данных"""
+        for value in (other.total, other.total_compensation):
+            self.total, self.total_compensation = neumaier_add(self.total, self.total_compensation, value)
+        for value in (other.c_log_c, other.c_log_c_compensation):
+            self.c_log_c, self.c_log_c_compensation = neumaier_add(self.c_log_c, self.c_log_c_compensation, value)
+        return self
+    
+    def sum(self):
+        """N = Σ c"""
+        return self.total + self.total_compensation
+    
+    def sum_c_log_c(self):
+        """S = Σ c·log₂ c"""
+        return self.c_log_c + self.c_log_c_compensation
+    
+    def entropy(self):
+        """Энтропия нормированного распределения: H = log₂ N - S / N"""
+        total = self.sum()
+        if total <= 0:
+            return 0.0
+        return math.log2(total) - self.sum_c_log_c() / total
 
 def calculate_entropy(probabilities):
     """Вычисление энтропии H(X) = -Σ p(x)·log₂ p(x)"""
-    entropy = 0
-    for i in range(len(probabilities)):
-        p = probabilities[i]
-        if p > 0:
-            entropy -= p * math.log2(p)
-    return entropy
+    return -EntropyAccumulator().update(probabilities).sum_c_log_c() + 0.0
 
-def main():
-    print("1 - Ввод с клавиатуры")
-    print("2 - Загрузка из файла")
-    choice = input("Выбор: ")
+def record_first_positions(first_positions, new_keys, keys, offset):
+    """
+    Запоминание позиции первого вхождения для ключей new_keys,
+    впервые встретившихся в блоке keys, который начинается с позиции offset.
+    Блок просматривается расширяющимися отрезками, поэтому работа пропорциональна
+    позиции последнего нового ключа, а не длине блока.
+    """
+    import numpy as np
     
-    message = ""
+    is_new = np.zeros(len(first_positions), dtype=bool)
+    is_new[new_keys] = True
+    remaining = len(new_keys)
+    start = 0
+    size = 4096
+    while remaining > 0 and start < len(keys):
+        part = keys[start:start + size]
+        positions = np.flatnonzero(is_new[part])
+        if len(positions):
+            found, first = np.unique(part[positions], return_index=True)
+            first_positions[found] = offset + start + positions[first]
+            is_new[found] = False
+            remaining -= len(found)
+        start += size
+        size *= 2
+
+class TextStatistics:
+    """
+    Частоты одиночных символов и пар, накапливаемые по частям текста.
+    Символы переводятся в плотные целочисленные коды: символы Latin-1 кодируются
+    своим номером, остальные получают следующие свободные коды. Частоты символов
+    и пар считаются через np.bincount, пары хранятся плотной матрицей, а для
+    алфавита больше DENSE_ALPHABET_LIMIT - словарем. Позиции первых вхождений
+    сохраняют порядок таблиц таким же, как при подсчете словарями.
+    Последний символ каждой части запоминается, поэтому пара на стыке
+    частей учитывается ровно один раз.
+    """
+    def __init__(self):
+        import numpy as np
+        
+        self.code_of = np.arange(256, dtype=np.intp)  # код символа по его номеру в Unicode
+        self.chars = [chr(code) for code in range(256)]  # символ по коду
+        self.capacity = 256
+        self.single_counts = np.zeros(self.capacity, dtype=np.int64)
+        self.single_first = np.zeros(self.capacity, dtype=np.int64)
+        self.pair_counts = np.zeros(self.capacity * self.capacity, dtype=np.int64)
+        self.pair_first = np.zeros(self.capacity * self.capacity, dtype=np.int64)
+        self.sparse_pairs = None  # ключ пары -> [частота, первая позиция]
+        self.total_chars = 0
+        self.first_char = None
+        self.last_code = None
     
-    if choice == "1":
-        message = input("Введите сообщение: ")
-    elif choice == "2":
-        filename = input("Введите имя файла: ")
+    def update(self, text):
+        import numpy as np
+        
+        if not text:
+            return self
+        
         try:
-            file = open(filename, 'r', encoding='utf-8')
-            message = file.read().strip()
-            file.close()
-        except FileNotFoundError:
-            print("Файл не найден!")
+            raw = text.encode('latin-1')
+            codes = np.frombuffer(raw, dtype=np.uint8)
+        except UnicodeEncodeError:
+            raw = None
+            codes = self.encode(text)
+        
+        # Пара на стыке с предыдущей частью
+        if self.last_code is None:
+            self.first_char = text[0]
+        else:
+            self.add_pair(self.last_code, int(codes[0]), self.total_chars - 1)
+        
+        # Пары внутри блока: пара (codes[i], codes[i+1]) стоит на позиции total_chars + i
+        if self.sparse_pairs is None:
+            if raw is not None and self.capacity == 256:
+                # Для кодов Latin-1 ключ пары codes[i]·256 + codes[i+1] - это двухбайтовое
+                # число big-endian, поэтому ключи читаются прямо из буфера: с четных и с нечетных позиций
+                keys = None
+                chunk = np.bincount(np.frombuffer(raw, dtype='>u2', count=len(raw) // 2), minlength=65536)
+                chunk += np.bincount(np.frombuffer(raw, dtype='>u2', offset=1, count=(len(raw) - 1) // 2),
+                                     minlength=65536)
+            else:
+                keys = codes[:-1].astype(np.uint32) * self.capacity + codes[1:]
+                chunk = np.bincount(keys, minlength=len(self.pair_counts))
+            new_keys = np.flatnonzero((chunk > 0) & (self.pair_counts == 0))
+            if len(new_keys):
+                if keys is None:
+                    keys = codes[:-1].astype(np.uint32) * self.capacity + codes[1:]
+                record_first_positions(self.pair_first, new_keys, keys, self.total_chars)
+            self.pair_counts += chunk
+            
+            # Частоты символов - суммы столбцов матрицы пар блока плюс первый символ
+            single_chunk = chunk.reshape(self.capacity, self.capacity).sum(axis=0)
+            single_chunk[codes[0]] += 1
+        else:
+            keys = codes[:-1].astype(np.int64) * SPARSE_KEY_BASE + codes[1:]
+            found, first, counts = np.unique(keys, return_index=True, return_counts=True)
+            for key, position, count in zip(found.tolist(), first.tolist(), counts.tolist()):
+                entry = self.sparse_pairs.get(key)
+                if entry is None:
+                    self.sparse_pairs[key] = [count, self.total_chars + position]
+                else:
+                    entry[0] += count
+            single_chunk = np.bincount(codes, minlength=self.capacity)
+        
+        # Одиночные символы
+        new_keys = np.flatnonzero((single_chunk > 0) & (self.single_counts == 0))
+        if len(new_keys):
+            record_first_positions(self.single_first, new_keys, codes, self.total_chars)
+        self.single_counts += single_chunk
+        
+        self.total_chars += len(codes)
+        self.last_code = int(codes[-1])
+        return self
+    
+    def add_pair(self, left, right, position):
+        """Учет одной пары кодов, стоящей на позиции position"""
+        if self.sparse_pairs is None:
+            key = left * self.capacity + right
+            if self.pair_counts[key] == 0:
+                self.pair_first[key] = position
+            self.pair_counts[key] += 1
+        else:
+            entry = self.sparse_pairs.setdefault(left * SPARSE_KEY_BASE + right, [0, position])
+            entry[0] += 1
+    
+    def pair_arrays(self):
+        """Ненулевые пары массивами: (левые коды, правые коды, частоты, первые позиции)"""
+        import numpy as np
+        
+        if self.sparse_pairs is None:
+            keys = np.flatnonzero(self.pair_counts)
+            return keys // self.capacity, keys % self.capacity, self.pair_counts[keys], self.pair_first[keys]
+        keys = np.fromiter(self.sparse_pairs.keys(), dtype=np.int64, count=len(self.sparse_pairs))
+        entries = np.array(list(self.sparse_pairs.values()), dtype=np.int64).reshape(-1, 2)
+        return keys // SPARSE_KEY_BASE, keys % SPARSE_KEY_BASE, entries[:, 0], entries[:, 1]
+    
+    def compact(self):
+        """
+        Компактная форма частот для передачи между процессами: только ненулевые
+        частоты без плотных таблиц. Пары задаются номерами символов в строке chars.
+        """
+        import numpy as np
+        
+        codes = np.flatnonzero(self.single_counts)
+        index_of = np.full(self.capacity, -1, dtype=np.int64)
+        index_of[codes] = np.arange(len(codes))
+        left, right, counts, first = self.pair_arrays()
+        return {
+            'chars': ''.join(self.chars[code] for code in codes.tolist()),
+            'single_counts': self.single_counts[codes],
+            'single_first': self.single_first[codes],
+            'pair_left': index_of[left].astype(np.int32),
+            'pair_right': index_of[right].astype(np.int32),
+            'pair_counts': counts,
+            'pair_first': first,
+            'total_chars': self.total_chars,
+            'first_char': self.first_char,
+            'last_char': self.chars[self.last_code] if self.last_code is not None else None,
+        }
+    
+    def merge(self, other):
+        """Добавление частот текста, который идет сразу за уже учтенным (см. merge_compact)"""
+        return self.merge_compact(other.compact())
+    
+    def merge_compact(self, other):
+        """
+        Добавление частот в компактной форме (compact()) для текста, который идет
+        сразу за уже учтенным. Символы другой части переводятся в свои коды,
+        позиции первых вхождений сдвигаются на длину учтенного текста, а пара
+        на стыке добавляется отдельно.
+        """
+        import numpy as np
+        
+        if other['total_chars'] == 0:
+            return self
+        
+        # Перевод номеров символов другой части в свои коды
+        mapping = np.asarray(self.encode(other['chars']), dtype=np.intp)
+        
+        if self.last_code is None:
+            self.first_char = other['first_char']
+        else:
+            first_code = int(mapping[other['chars'].index(other['first_char'])])
+            self.add_pair(self.last_code, first_code, self.total_chars - 1)
+        offset = self.total_chars
+        
+        # Одиночные символы
+        new = self.single_counts[mapping] == 0
+        self.single_first[mapping[new]] = offset + other['single_first'][new]
+        self.single_counts[mapping] += other['single_counts']
+        
+        # Пары символов
+        left = mapping[other['pair_left']]
+        right = mapping[other['pair_right']]
+        counts = other['pair_counts']
+        first = other['pair_first']
+        if self.sparse_pairs is None:
+            keys = left * self.capacity + right
+            new = self.pair_counts[keys] == 0
+            self.pair_first[keys[new]] = offset + first[new]
+            self.pair_counts[keys] += counts
+        else:
+            keys = left.astype(np.int64) * SPARSE_KEY_BASE + right
+            for key, count, position in zip(keys.tolist(), counts.tolist(), first.tolist()):
+                entry = self.sparse_pairs.setdefault(key, [0, offset + position])
+                entry[0] += count
+        
+        self.total_chars += other['total_chars']
+        self.last_code = int(mapping[other['chars'].index(other['last_char'])])
+        return self
+    
+    def encode(self, text):
+        """Перевод текста в коды с выдачей новых кодов ранее не встречавшимся символам"""
+        import numpy as np
+        
+        points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        top = int(points.max())
+        if top >= len(self.code_of):
+            code_of = np.full(top + 1, -1, dtype=np.intp)
+            code_of[:len(self.code_of)] = self.code_of
+            self.code_of = code_of
+        
+        codes = self.code_of[points]
+        missing = np.flatnonzero(codes < 0)
+        if len(missing):
+            new_points = np.unique(points[missing])
+            self.code_of[new_points] = np.arange(len(self.chars), len(self.chars) + len(new_points))
+            self.chars.extend(chr(point) for point in new_points.tolist())
+            self.grow(len(self.chars))
+            codes = self.code_of[points]
+        return codes
+    
+    def grow(self, alphabet_size):
+        """Увеличение емкости таблиц до степени двойки, не меньшей размера алфавита"""
+        import numpy as np
+        
+        if alphabet_size <= self.capacity:
             return
-    else:
-        print("Неверный выбор!")
-        return
+        old = self.capacity
+        new = 1 << (alphabet_size - 1).bit_length()
+        
+        self.single_counts = np.concatenate((self.single_counts, np.zeros(new - old, dtype=np.int64)))
+        self.single_first = np.concatenate((self.single_first, np.zeros(new - old, dtype=np.int64)))
+        
+        if self.sparse_pairs is None:
+            if new > DENSE_ALPHABET_LIMIT:
+                # Переход к словарю пар
+                nonzero = np.flatnonzero(self.pair_counts)
+                keys = (nonzero // old) * SPARSE_KEY_BASE + nonzero % old
+                self.sparse_pairs = {
+                    key: [count, first] for key, count, first in zip(
+                        keys.tolist(), self.pair_counts[nonzero].tolist(), self.pair_first[nonzero].tolist())
+                }
+                self.pair_counts = None
+                self.pair_first = None
+            else:
+                for name in ('pair_counts', 'pair_first'):
+                    matrix = np.zeros((new, new), dtype=np.int64)
+                    matrix[:old, :old] = getattr(self, name).reshape(old, old)
+                    setattr(self, name, matrix.reshape(-1))
+        self.capacity = new
     
-    if len(message) == 0:
-        print("Сообщение пустое!")
-        return
+    @property
+    def total_pairs(self):
+        return max(self.total_chars - 1, 0)
+    
+    @property
+    def single_counter(self):
+        """Частоты символов в порядке первого вхождения: {символ: частота}"""
+        import numpy as np
+        
+        codes = np.flatnonzero(self.single_counts)
+        codes = codes[np.argsort(self.single_first[codes], kind='stable')]
+        return {self.chars[code]: count for code, count in zip(codes.tolist(), self.single_counts[codes].tolist())}
+    
+    @property
+    def pair_counter(self):
+        """Частоты пар в порядке первого вхождения: {пара: частота}"""
+        import numpy as np
+        
+        if self.sparse_pairs is None:
+            keys = np.flatnonzero(self.pair_counts)
+            keys = keys[np.argsort(self.pair_first[keys], kind='stable')]
+            return {self.chars[key // self.capacity] + self.chars[key % self.capacity]: count
+                    for key, count in zip(keys.tolist(), self.pair_counts[keys].tolist())}
+        
+        items = sorted(self.sparse_pairs.items(), key=lambda item: item[1][1])
+        return {self.chars[key // SPARSE_KEY_BASE] + self.chars[key % SPARSE_KEY_BASE]: entry[0]
+                for key, entry in items}
+    
+    def single_values(self):
+        """Ненулевые частоты символов массивом"""
+        return self.single_counts[self.single_counts > 0]
     
-    # Обработка одиночных символов
-    single_chars = list(message)
-    total_chars = len(single_chars)
+    def pair_values(self):
+        """Ненулевые частоты пар массивом"""
+        import numpy as np
+        
+        if self.sparse_pairs is None:
+            return self.pair_counts[self.pair_counts > 0]
+        return np.array([entry[0] for entry in self.sparse_pairs.values()], dtype=np.int64)
     
-    # Подсчет частот одиночных символов
-    single_counter = {}
-    for i in range(total_chars):
-        char = single_chars[i]
-        if char in single_counter:
-            single_counter[char] += 1
+    @property
+    def alphabet_size(self):
+        import numpy as np
+        
+        return int(np.count_nonzero(self.single_counts))
+
+class ByteStatistics:
+    """
+    Частоты байтов и пар байтов для двоичных файлов.
+    
+    Символ — байт, поэтому частоты лежат в массивах фиксированного размера:
+    256 для байтов и 65536 для пар. Пары блока считаются одним bincount по
+    big-endian 16-битным словам, прочитанным с четного и нечетного смещения;
+    пара на стыке блоков добавляется отдельно. Интерфейс тот же, что у
+    TextStatistics, так что характеристики и таблицы считаются теми же функциями.
+    """
+    
+    def __init__(self):
+        import numpy as np
+        
+        self.single_counts = np.zeros(256, dtype=np.int64)
+        self.pair_counts = np.zeros(256 * 256, dtype=np.int64)
+        self.total_chars = 0
+        self.last_byte = None
+    
+    def update(self, data):
+        """Учет очередного блока байтов (bytes, bytearray, memoryview или срез mmap)"""
+        import numpy as np
+        
+        size = len(data)
+        if size == 0:
+            return self
+        self.single_counts += np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        even = np.frombuffer(data, dtype='>u2', count=size // 2)
+        odd = np.frombuffer(data, dtype='>u2', count=(size - 1) // 2, offset=1)
+        self.pair_counts += np.bincount(even, minlength=65536)
+        self.pair_counts += np.bincount(odd, minlength=65536)
+        
+        if self.last_byte is not None:
+            self.pair_counts[self.last_byte * 256 + data[0]] += 1
+        self.last_byte = data[size - 1]
+        self.total_chars += size
+        return self
+    
+    @property
+    def total_pairs(self):
+        return max(self.total_chars - 1, 0)
+    
+    @property
+    def single_counter(self):
+        """Частоты байтов по возрастанию значения: {'4f': частота}"""
+        import numpy as np
+        
+        codes = np.flatnonzero(self.single_counts)
+        return {f"{code:02x}": count for code, count in zip(codes.tolist(), self.single_counts[codes].tolist())}
+    
+    @property
+    def pair_counter(self):
+        """Частоты пар байтов по возрастанию значения: {'4f4b': частота}"""
+        import numpy as np
+        
+        keys = np.flatnonzero(self.pair_counts)
+        return {f"{key:04x}": count for key, count in zip(keys.tolist(), self.pair_counts[keys].tolist())}
+    
+    def single_values(self):
+        """Ненулевые частоты байтов массивом"""
+        return self.single_counts[self.single_counts > 0]
+    
+    def pair_values(self):
+        """Ненулевые частоты пар массивом"""
+        return self.pair_counts[self.pair_counts > 0]
+    
+    @property
+    def alphabet_size(self):
+        import numpy as np
+        
+        return int(np.count_nonzero(self.single_counts))
+
+def analyze_bytes(filename, use_mmap=False, unpack=False, chunk_size=CHUNK_SIZE):
+    """
+    Потоковый подсчет частот байтов файла без декодирования.
+    Считаются байты самого файла, даже если он сжат, — так видно, насколько его еще
+    можно сжать; при unpack=True сжатый файл (.gz, .bz2, .xz) распаковывается потоком.
+    При use_mmap=True несжатый файл отображается в память и блоки берутся срезами отображения.
+    """
+    stats = ByteStatistics()
+    module = compression_of(filename) if unpack else None
+    if module is not None:
+        print(f"Файл распакован ({module}): статистика по распакованным данным")
+    opened = open_input(filename, text=False) if module is not None else open(filename, 'rb')
+    with opened as file:
+        if use_mmap and module is None and os.fstat(file.fileno()).st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, len(view), chunk_size):
+                        stats.update(view[start:start + chunk_size])
+                finally:
+                    view.release()
+        else:
+            while True:
+                data = file.read(chunk_size)
+                if not data:
+                    break
+                stats.update(data)
+    return stats
+
+# Сигнатуры сжатых файлов: (регулярное выражение для начальных байтов, модуль распаковки).
+# У bzip2 кроме "BZh" проверяются цифра размера блока и магическое число первого блока
+# (или конца потока для пустого архива), иначе за архив принимается текст, начинающийся с "BZh"
+COMPRESSED_SIGNATURES = (
+    (re.compile(rb'\x1f\x8b'), 'gzip'),
+    (re.compile(rb'BZh[1-9](?:\x31\x41\x59\x26\x53\x59|\x17\x72\x45\x38\x50\x90)'), 'bz2'),
+    (re.compile(rb'\xfd7zXZ\x00'), 'lzma'),
+)
+
+def compression_of(filename):
+    """Имя модуля распаковки для сжатого файла (.gz, .bz2, .xz) или None"""
+    with open(filename, 'rb') as file:
+        head = file.read(10)
+    for signature, module in COMPRESSED_SIGNATURES:
+        if signature.match(head):
+            return module
+    return None
+
+def open_input(filename, text=True):
+    """
+    Открытие входного файла; сжатый файл распознается по сигнатуре и
+    распаковывается потоком по мере чтения, без временного файла.
+    text=True — текст UTF-8 с переводом строк как у open(), иначе байты.
+    """
+    import importlib
+    
+    module = compression_of(filename)
+    if module is None:
+        return open(filename, 'r', encoding='utf-8') if text else open(filename, 'rb')
+    opener = importlib.import_module(module).open
+    return opener(filename, 'rt', encoding='utf-8') if text else opener(filename, 'rb')
+
+def read_stripped_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Чтение текстового файла блоками с тем же результатом, что и file.read().strip():
+    пробельные символы в начале отбрасываются, а пробельный хвост блока
+    откладывается до следующего непробельного символа.
+    """
+    pending = ""
+    started = False
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        
+        text = pending + chunk
+        body = text.rstrip()
+        pending = text[len(body):]
+        if body:
+            yield body
+
+def analyze_file(filename, chunk_size=CHUNK_SIZE):
+    """Потоковый подсчет частот по файлу: в памяти находится только один блок"""
+    stats = TextStatistics()
+    with open_input(filename) as file:
+        for chunk in read_stripped_chunks(file, chunk_size):
+            stats.update(chunk)
+    return stats
+
+def merge_runs(older, newer):
+    """
+    Слияние двух отсортированных серий (ключи, частоты) в одну.
+    Ключи меньшей серии ищутся в большей через searchsorted: совпавшим прибавляются
+    частоты, остальные ставятся на свои места — без повторной сортировки.
+    """
+    import numpy as np
+    
+    if len(older[0]) < len(newer[0]):
+        older, newer = newer, older
+    keys, counts = older
+    new_keys, new_counts = newer
+    positions = np.searchsorted(keys, new_keys)
+    found = positions < len(keys)
+    found[found] = keys[positions[found]] == new_keys[found]
+    
+    counts = counts.copy()
+    counts[positions[found]] += new_counts[found]
+    missing = ~found
+    inserted = positions[missing]
+    
+    # Место в результате: j-й вставляемый ключ сдвигается на j, старый ключ i — на число
+    # вставок перед ним; обе серии отсортированы, поэтому позиции находятся без сортировки
+    size = len(keys) + len(inserted)
+    merged_keys = np.empty(size, dtype=keys.dtype)
+    merged_counts = np.empty(size, dtype=counts.dtype)
+    new_places = inserted + np.arange(len(inserted))
+    merged_keys[new_places] = new_keys[missing]
+    merged_counts[new_places] = new_counts[missing]
+    old_places = np.ones(size, dtype=bool)
+    old_places[new_places] = False
+    merged_keys[old_places] = keys
+    merged_counts[old_places] = counts
+    return merged_keys, merged_counts
+
+class BlockEntropies:
+    """
+    Частоты блоков из k символов (k-грамм) для всех порядков до max_order за один проход.
+    
+    Каждая k-грамма представлена целым ключом — полиномиальным хешем по модулю 2⁶⁴,
+    который получается из ключа (k-1)-граммы одним умножением и сложением.
+    Для каждого порядка хранятся отсортированные серии (ключи, частоты), как в
+    LSM-дереве: серия блока сливается с предыдущими, только пока они не более чем вдвое
+    больше нее, поэтому каждый ключ переслияется O(log числа блоков) раз, а не на каждом блоке.
+    Последние max_order - 1 символов блока переносятся в следующий блок,
+    поэтому k-граммы на стыках блоков не теряются.
+    """
+    
+    def __init__(self, max_order=MAX_BLOCK_ORDER):
+        import numpy as np
+        
+        self.max_order = max_order
+        self.runs = [[] for _ in range(max_order)]
+        self.carry = np.zeros(0, dtype=np.uint64)
+        self.total_chars = 0
+    
+    def update(self, text):
+        """Учет очередного блока текста"""
+        import numpy as np
+        
+        if not text:
+            return self
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        sequence = np.concatenate((self.carry, codes))
+        carried = len(self.carry)
+        multiplier = np.uint64(BLOCK_HASH_MULTIPLIER)
+        
+        keys = np.zeros(len(sequence), dtype=np.uint64)
+        for k in range(1, self.max_order + 1):
+            if len(sequence) < k:
+                break
+            # Ключ k-граммы, начинающейся в позиции i: hₖ[i] = hₖ₋₁[i]·M + s[i+k-1]
+            keys = keys[:len(sequence) - k + 1] * multiplier + sequence[k - 1:]
+            # Новые k-граммы — те, что заканчиваются за пределами перенесенных символов
+            self.add(k, keys[max(0, carried - k + 1):])
+        
+        self.carry = sequence[-(self.max_order - 1):] if self.max_order > 1 else sequence[:0]
+        self.total_chars += len(codes)
+        return self
+    
+    def add(self, order, keys):
+        """Серия частот ключей блока; слияние с последними сериями порядка order по правилу LSM"""
+        import numpy as np
+        
+        runs = self.runs[order - 1]
+        runs.append(np.unique(keys, return_counts=True))
+        while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+            newer = runs.pop()
+            runs[-1] = merge_runs(runs[-1], newer)
+    
+    def frequencies(self, order):
+        """Частоты всех различных k-грамм порядка order (серии сливаются в одну)"""
+        runs = self.runs[order - 1]
+        while len(runs) > 1:
+            newer = runs.pop()
+            runs[-1] = merge_runs(runs[-1], newer)
+        return runs[0][1] if runs else []
+    
+    def entropies(self):
+        """
+        Список (k, H(X₁..Xₖ), H(Xₖ|X₁..Xₖ₋₁)) для порядков, по которым есть хотя бы одна k-грамма.
+        Условная энтропия считается как разность блочных энтропий соседних порядков.
+        """
+        result = []
+        previous = 0.0
+        for k in range(1, self.max_order + 1):
+            counts = self.frequencies(k)
+            if not len(counts):
+                break
+            H = EntropyAccumulator().update_array(counts).entropy()
+            result.append((k, H, H - previous))
+            previous = H
+        return result
+
+def analyze_blocks(filename, max_order=MAX_BLOCK_ORDER, chunk_size=CHUNK_SIZE):
+    """Блочные энтропии по файлу за один потоковый проход"""
+    blocks = BlockEntropies(max_order)
+    with open_input(filename) as file:
+        for chunk in read_stripped_chunks(file, chunk_size):
+            blocks.update(chunk)
+    return blocks
+
+def print_block_entropies(blocks):
+    """Таблица блочных и условных энтропий и сходимость оценки энтропии на символ"""
+    print("\nБЛОЧНЫЕ ЭНТРОПИИ")
+    print("-" * 70)
+    print(f"{'k':<3} {'Различных k-грамм':>18} {'H(X₁..Xₖ)':>12} {'H/k':>10} {'H(Xₖ|X₁..Xₖ₋₁)':>16} {'Δ':>9}")
+    print("-" * 70)
+    conditional_previous = None
+    for k, H, conditional in blocks.entropies():
+        delta = "" if conditional_previous is None else f"{conditional - conditional_previous:>9.4f}"
+        print(f"{k:<3} {len(blocks.frequencies(k)):>18} {H:>12.6f} {H / k:>10.6f} {conditional:>16.6f} {delta:>9}")
+        conditional_previous = conditional
+    print("\nH(Xₖ|X₁..Xₖ₋₁) не возрастает с ростом k и вместе с H/k сходится к энтропии на символ;")
+    print("если число различных k-грамм сравнимо с длиной текста, оценки старших порядков занижены.")
+
+class SlidingEntropyMonitor:
+    """
+    Энтропии по скользящему окну из последних window символов потока.
+    
+    Для символов и пар окна хранятся частоты и суммы S = Σ c·log₂ c, так что
+    H = log₂ N - S / N. При изменении частоты с c на c' сумма поправляется на
+    c'·log₂ c' - c·log₂ c (значения берутся из таблицы), поэтому сдвиг окна на
+    символ стоит O(1). Символы подаются пачками: изменения частот внутри пачки
+    сначала суммируются, и S поправляется один раз на каждый затронутый ключ.
+    Символы получают плотные коды, и частоты пар хранятся в плоском массиве,
+    пока алфавит не больше DENSE_ALPHABET_LIMIT, а дальше — в словаре.
+    """
+    
+    def __init__(self, window=MONITOR_WINDOW):
+        import numpy as np
+        
+        self.window = window
+        self.code_of = np.full(0x110000, -1, dtype=np.int64)  # кодовая точка -> плотный код
+        self.alphabet_size = 0
+        self.capacity = 16
+        self.history = np.zeros(0, dtype=np.int64)  # коды символов текущего окна
+        self.single = np.zeros(self.capacity, dtype=np.int64)
+        self.pair = np.zeros(self.capacity * self.capacity, dtype=np.int64)
+        self.sparse_pairs = None
+        self.single_sum = (0.0, 0.0)  # (S, компенсация) для символов
+        self.pair_sum = (0.0, 0.0)    # (S, компенсация) для пар
+        counts = np.arange(window + 1, dtype=float)
+        self.c_log_c = counts * np.log2(np.maximum(counts, 1))
+        self.total_chars = 0
+    
+    def update(self, text):
+        """Сдвиг окна на символы text"""
+        import numpy as np
+        
+        if not text:
+            return self
+        codes = self.encode(text)
+        full = np.concatenate((self.history, codes))
+        cut = max(0, len(full) - self.window)  # столько символов покидает окно
+        entering = max(0, len(self.history) - 1)  # первая пара, в которой есть новый символ
+        
+        self.single_sum = self.apply(self.single, self.single_sum, codes, full[:cut])
+        if self.sparse_pairs is None:
+            pairs = full[:-1] * self.capacity + full[1:]
+            self.pair_sum = self.apply(self.pair, self.pair_sum, pairs[entering:], pairs[:cut])
         else:
-            single_counter[char] = 1
-    
-    # Вероятности одиночных символов
-    single_probs = {}
-    single_prob_list = []
-    chars = list(single_counter.keys())
-    for i in range(len(chars)):
-        char = chars[i]
-        prob = single_counter[char] / total_chars
-        single_probs[char] = prob
-        single_prob_list.append(prob)
-    
-    # Обработка пар символов
-    pairs = []
-    for i in range(len(message) - 1):
-        pair = message[i:i+2]
-        pairs.append(pair)
-    
-    total_pairs = len(pairs)
-    
-    # Подсчет частот пар символов
-    pair_counter = {}
-    for i in range(total_pairs):
-        pair = pairs[i]
-        if pair in pair_counter:
-            pair_counter[pair] += 1
+            pairs = full[:-1] * SPARSE_KEY_BASE + full[1:]
+            self.pair_sum = self.apply_sparse(pairs[entering:], pairs[:cut])
+        
+        self.history = full[cut:]
+        self.total_chars += len(codes)
+        return self
+    
+    def encode(self, text):
+        """Плотные коды символов; новым символам выдаются следующие свободные коды"""
+        import numpy as np
+        
+        points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        codes = self.code_of[points]
+        unseen = codes < 0
+        if unseen.any():
+            new_points = np.unique(points[unseen])
+            self.code_of[new_points] = np.arange(self.alphabet_size, self.alphabet_size + len(new_points))
+            self.alphabet_size += len(new_points)
+            self.grow()
+            codes = self.code_of[points]
+        return codes
+    
+    def grow(self):
+        """Увеличение таблиц частот под размер алфавита"""
+        import numpy as np
+        
+        if self.alphabet_size <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < self.alphabet_size:
+            capacity *= 2
+        single = np.zeros(capacity, dtype=np.int64)
+        single[:self.capacity] = self.single
+        self.single = single
+        
+        if self.sparse_pairs is None:
+            old = self.pair.reshape(self.capacity, self.capacity)
+            if capacity <= DENSE_ALPHABET_LIMIT:
+                pair = np.zeros((capacity, capacity), dtype=np.int64)
+                pair[:self.capacity, :self.capacity] = old
+                self.pair = pair.reshape(-1)
+            else:
+                left, right = np.nonzero(old)
+                self.sparse_pairs = dict(zip((left * SPARSE_KEY_BASE + right).tolist(), old[left, right].tolist()))
+                self.pair = None
+        self.capacity = capacity
+    
+    def apply(self, counts, total, added, removed):
+        """Изменение частот в массиве counts на пачку добавленных и удаленных ключей с поправкой суммы S"""
+        import numpy as np
+        
+        deltas = np.bincount(added, minlength=len(counts))
+        if len(removed):
+            deltas = deltas - np.bincount(removed, minlength=len(counts))
+        changed = np.flatnonzero(deltas)
+        old = counts[changed]
+        new = old + deltas[changed]
+        counts[changed] = new
+        change = float(self.c_log_c[new].sum() - self.c_log_c[old].sum())
+        return neumaier_add(*total, change)
+    
+    def apply_sparse(self, added, removed):
+        """То же для частот пар в словаре"""
+        import numpy as np
+        
+        keys, inverse = np.unique(np.concatenate((added, removed)), return_inverse=True)
+        signs = np.concatenate((np.ones(len(added)), -np.ones(len(removed))))
+        deltas = np.bincount(inverse, weights=signs, minlength=len(keys)).astype(np.int64)
+        
+        change = 0.0
+        counts = self.sparse_pairs
+        c_log_c = self.c_log_c
+        for key, delta in zip(keys.tolist(), deltas.tolist()):
+            if delta == 0:
+                continue
+            old = counts.get(key, 0)
+            new = old + delta
+            change += c_log_c[new] - c_log_c[old]
+            if new:
+                counts[key] = new
+            else:
+                del counts[key]
+        return neumaier_add(*self.pair_sum, change)
+    
+    def characteristics(self):
+        """H(X), H(Y|X) и избыточности по символам текущего окна"""
+        N = len(self.history)
+        H_X = math.log2(N) - sum(self.single_sum) / N if N > 0 else 0.0
+        H_XY = math.log2(N - 1) - sum(self.pair_sum) / (N - 1) if N > 1 else 0.0
+        H_Y_X = H_XY - H_X
+        m = self.distinct()
+        Dp, Ds, D = redundancies(H_X, H_Y_X, m)
+        return {'N': N, 'm': m, 'H_X': H_X, 'H_Y_X': H_Y_X, 'Dp': Dp, 'Ds': Ds, 'D': D}
+    
+    def distinct(self):
+        """Число различных символов в окне"""
+        import numpy as np
+        
+        return int(np.count_nonzero(self.single))
+
+def read_stream(file, follow=False, chunk_size=CHUNK_SIZE):
+    """
+    Чтение текста из двоичного потока блоками с переводом строк к \n.
+    При follow=True после конца файла чтение повторяется (как tail -f) до Ctrl+C.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    while True:
+        data = file.read1(chunk_size) if hasattr(file, 'read1') else file.read(chunk_size)
+        if data:
+            text = decoder.decode(data)
+            if text:
+                yield text
+        elif follow:
+            time.sleep(FOLLOW_INTERVAL)
         else:
-            pair_counter[pair] = 1
-    
-    # Вероятности пар символов
-    pair_probs = {}
-    pair_prob_list = []
-    pair_keys = list(pair_counter.keys())
-    for i in range(len(pair_keys)):
-        pair = pair_keys[i]
-        prob = pair_counter[pair] / total_pairs
-        pair_probs[pair] = prob
-        pair_prob_list.append(prob)
-    
-    # Сортировка одиночных символов по частоте (убывание)
-    sorted_singles = []
-    for char, count in single_counter.items():
-        sorted_singles.append((char, count))
-    
-    # Сортировка по убыванию частоты
-    sorted_singles.sort(key=lambda x: x[1], reverse=True)
-    
-    # Сортировка пар символов по частоте (убывание)
-    sorted_pairs = []
-    for pair, count in pair_counter.items():
-        sorted_pairs.append((pair, count))
-    
-    # Сортировка по убыванию частоты
-    sorted_pairs.sort(key=lambda x: x[1], reverse=True)
-    
-    # Вычисление энтропий
-    H_X = calculate_entropy(single_prob_list)  # H(X) = -Σ p(x)·log₂ p(x)
-    H_XY = calculate_entropy(pair_prob_list)   # H(XY) = -Σ p(x,y)·log₂ p(x,y)
+            break
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+def monitor_stream(file, window=MONITOR_WINDOW, cadence=MONITOR_CADENCE, follow=False):
+    """
+    Вывод энтропий скользящего окна каждые cadence символов потока.
+    В каждой строке — задержка обновления на символ и пропускная способность.
+    """
+    monitor = SlidingEntropyMonitor(window)
+    print(f"{'Позиция':>12} {'m':>6} {'H(X)':>10} {'H(Y|X)':>10} {'D':>9} {'нс/символ':>10} {'МБ/с':>8}")
+    pending = ""
+    busy = 0.0
+    processed_bytes = 0
+    try:
+        for text in read_stream(file, follow):
+            pending += text
+            while len(pending) >= cadence:
+                batch, pending = pending[:cadence], pending[cadence:]
+                began = time.perf_counter()
+                monitor.update(batch)
+                c = monitor.characteristics()
+                elapsed = time.perf_counter() - began
+                busy += elapsed
+                size = len(batch.encode('utf-8'))
+                processed_bytes += size
+                print(f"{monitor.total_chars:>12} {c['m']:>6} {c['H_X']:>10.6f} {c['H_Y_X']:>10.6f} {c['D']:>9.6f} "
+                      f"{elapsed / len(batch) * 1e9:>10.1f} {size / 2**20 / elapsed:>8.1f}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    
+    if pending:
+        began = time.perf_counter()
+        monitor.update(pending)
+        busy += time.perf_counter() - began
+        processed_bytes += len(pending.encode('utf-8'))
+        c = monitor.characteristics()
+        print(f"{monitor.total_chars:>12} {c['m']:>6} {c['H_X']:>10.6f} {c['H_Y_X']:>10.6f} {c['D']:>9.6f}")
+    if busy > 0:
+        print(f"Обработано символов: {monitor.total_chars}, "
+              f"средняя скорость обновления: {processed_bytes / 2**20 / busy:.1f} МБ/с")
+    return monitor
+
+def content_bounds(filename, block_size=CHUNK_SIZE):
+    """
+    Байтовые границы текста после strip(): первый и последний непробельный
+    символ ищутся чтением блоков с начала и с конца файла.
+    Граница блока сдвигается к началу символа UTF-8.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as file:
+        start = 0
+        while start < size:
+            file.seek(start)
+            # Незавершенный символ в конце блока декодер оставляет до следующего чтения,
+            # а в конце файла это ошибка UnicodeDecodeError, как при последовательном чтении
+            data = file.read(block_size)
+            text = codecs.getincrementaldecoder('utf-8')().decode(data, final=start + len(data) >= size)
+            stripped = text.lstrip()
+            if stripped:
+                start += len(text[:len(text) - len(stripped)].encode('utf-8'))
+                break
+            start += len(text.encode('utf-8'))
+        
+        end = size
+        while end > start:
+            block_start = max(start, end - block_size)
+            file.seek(block_start)
+            data = file.read(end - block_start)
+            skip = char_boundary(data, 0)
+            text = data[skip:].decode('utf-8')
+            stripped = text.rstrip()
+            if stripped:
+                end = block_start + skip + len(stripped.encode('utf-8'))
+                break
+            end = block_start + skip
+    return start, max(start, end)
+
+def char_boundary(data, position):
+    """
+    Ближайшая к position (не левее) граница символа UTF-8 в байтах data,
+    не разрывающая перевод строки \r\n.
+    """
+    while position < len(data) and (data[position] & 0xC0) == 0x80:
+        position += 1
+    if 0 < position < len(data) and data[position] == 0x0A and data[position - 1] == 0x0D:
+        position += 1
+    return position
+
+def shard_offsets(filename, start, end, shards):
+    """Разбиение байтового диапазона [start, end) на части по границам символов"""
+    offsets = [start]
+    with open(filename, 'rb') as file:
+        for i in range(1, shards):
+            target = start + (end - start) * i // shards
+            if target <= offsets[-1]:
+                continue
+            file.seek(target - 1)
+            data = file.read(8)
+            offsets.append(min(end, target - 1 + char_boundary(data, 1)))
+    offsets.append(end)
+    return [(a, b) for a, b in zip(offsets, offsets[1:]) if b > a]
+
+def count_shard(filename, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Подсчет частот по байтам [start, end) файла в отдельном процессе.
+    Переводы строк приводятся к \n так же, как при чтении файла в текстовом режиме.
+    Возвращает (частоты, время в секундах).
+    """
+    began = time.perf_counter()
+    stats = TextStatistics()
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = file.read(min(chunk_size, remaining))
+            remaining -= len(data)
+            stats.update(decoder.decode(data, final=remaining == 0))
+    return stats, time.perf_counter() - began
+
+def analyze_file_parallel(filename, workers=None, baseline=False):
+    """
+    Параллельный подсчет частот: файл делится на части по границам символов UTF-8,
+    части считаются в пуле процессов и объединяются по порядку, причем пара
+    на стыке соседних частей добавляется при объединении. Результат совпадает
+    с последовательным подсчетом.
+    При baseline=True тот же диапазон байтов затем считается count_shard в одном
+    процессе и выводится достигнутое ускорение: последовательное время / общее время.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if compression_of(filename) is not None:
+        # В сжатом потоке нельзя перейти к произвольному смещению
+        print("Сжатый файл обрабатывается последовательно")
+        return analyze_file(filename)
+    
+    began = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    start, end = content_bounds(filename)
+    shards = shard_offsets(filename, start, end, workers)
+    
+    stats = TextStatistics()
+    shard_times = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(count_shard, filename, a, b) for a, b in shards]
+        for (a, b), future in zip(shards, futures):
+            shard_stats, seconds = future.result()
+            stats.merge(shard_stats)
+            shard_times.append(seconds)
+            print(f"Часть {len(shard_times)}: байты {a}..{b}, {(b - a) / 2**20:.1f} МБ за {seconds:.3f} с")
+    
+    elapsed = time.perf_counter() - began
+    # Сумма времен частей к общему времени — среднее число одновременно занятых процессов,
+    # а не ускорение: для него нужен замер последовательного подсчета (baseline)
+    print(f"Частей: {len(shards)}, процессов: {workers}, общее время: {elapsed:.3f} с, "
+          f"оценка параллельности (сумма времен частей / общее время): {sum(shard_times) / elapsed:.2f}")
+    if baseline:
+        _, serial_time = count_shard(filename, start, end)
+        print(f"Последовательный подсчет того же диапазона: {serial_time:.3f} с, "
+              f"ускорение: {serial_time / elapsed:.2f}×")
+    return stats
+
+def redundancies(H_X, H_Y_X, m):
+    """Избыточности неравномерности Dp, статистической связи Ds и полная D"""
+    # Dₚ = 1 - H(X) / log₂ m - избыточность неравномерности
+    if m > 1:
+        Dp = 1 - (H_X / math.log2(m))
+    else:
+        Dp = 0
+    
+    # Dₛ = 1 - H(Y|X) / H(X) - избыточность статистической связи
+    if H_X > 0:
+        Ds = 1 - (H_Y_X / H_X)
+    else:
+        Ds = 0
+    
+    # D = Dₚ + Dₛ - Dₚ·Dₛ - полная избыточность
+    D = Dp + Ds - Dp * Ds
+    return Dp, Ds, D
+
+def file_identity(filename):
+    """Идентификатор файла: абсолютный путь, устройство и номер inode"""
+    info = os.stat(filename)
+    return os.path.abspath(filename), info.st_dev, info.st_ino
+
+def prefix_digest(filename, end, chunk_size=CHUNK_SIZE):
+    """Объект хеша BLAKE2b по первым end байтам файла"""
+    digest = hashlib.blake2b()
+    with open(filename, 'rb') as file:
+        remaining = end
+        while remaining > 0:
+            data = file.read(min(chunk_size, remaining))
+            if not data:
+                break
+            digest.update(data)
+            remaining -= len(data)
+    return digest
+
+def load_index(filename):
+    """Содержимое индекса файла или None, если индекса нет или он не читается"""
+    try:
+        with open(filename + INDEX_SUFFIX, 'rb') as file:
+            index = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+def save_index(filename, index):
+    """Запись индекса через временный файл, чтобы прерванная запись не портила старый индекс"""
+    path = filename + INDEX_SUFFIX
+    with open(path + '.tmp', 'wb') as file:
+        pickle.dump(index, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+def analyze_file_indexed(filename):
+    """
+    Подсчет частот с сохранением индекса рядом с файлом.
+    
+    В индексе лежат накопленные частоты (вместе с последним символом), байтовое
+    смещение конца учтенного текста и хеш всех байтов до этого смещения.
+    Если файл тот же и его начало не изменилось, дочитывается только дописанный
+    хвост, и его частоты объединяются с сохраненными. Иначе индекс строится заново.
+    Возвращает (частоты, байт взято из индекса, байт дочитано).
+    Для сжатого файла индекс не ведется: смещения в распакованном потоке
+    не проверить без полной распаковки, поэтому файл просто считается целиком.
+    """
+    if compression_of(filename) is not None:
+        return analyze_file(filename), 0, os.path.getsize(filename)
+    
+    start, end = content_bounds(filename)
+    identity = file_identity(filename)
+    index = load_index(filename)
+    
+    stats = None
+    if index is not None and index['identity'] == identity and index['offset'] <= end:
+        digest = prefix_digest(filename, index['offset'])
+        if digest.digest() == index['checksum']:
+            stats = index['stats']
+            if stats.total_chars > 0:
+                start = index['offset']
+    if stats is None:
+        stats = TextStatistics()
+        digest = prefix_digest(filename, start)
+    reused = start if stats.total_chars > 0 else 0
+    
+    if end > start:
+        stats.merge(count_shard(filename, start, end)[0])
+        with open(filename, 'rb') as file:
+            file.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = file.read(min(CHUNK_SIZE, remaining))
+                digest.update(data)
+                remaining -= len(data)
+    
+    save_index(filename, {
+        'version': INDEX_VERSION,
+        'identity': identity,
+        'offset': end,
+        'checksum': digest.digest(),
+        'stats': stats,
+    })
+    return stats, reused, end - start
+
+def compute_characteristics(stats):
+    """
+    Энтропии и избыточности по накопленным частотам.
+    Энтропии считаются прямо по частотам: H = log₂ N - Σ c·log₂ c / N
+    """
+    H_X = EntropyAccumulator().update_array(stats.single_values()).entropy()  # H(X) = -Σ p(x)·log₂ p(x)
+    H_XY = EntropyAccumulator().update_array(stats.pair_values()).entropy()   # H(XY) = -Σ p(x,y)·log₂ p(x,y)
     H_Y_X = H_XY - H_X  # H(Y|X) = H(XY) - H(X)
     I_Y_X = H_X - H_Y_X  # I(Y,X) = H(X) - H(Y|X)
     
     # Вычисление избыточностей
-    m = len(single_probs)  # количество различных символов
+    m = stats.alphabet_size  # количество различных символов
     
     # Длина кода при равномерном кодировании через логарифм по основанию 2
     if m > 0:
@@ -116,83 +1171,338 @@ def main():
     else:
         l = 0
     
-    # D₀ = 1 - (log₂ m / l) - избыточность округления
-    if m > 0:
+    # D₀ = 1 - (log₂ m / l) - избыточность округления; при m = 1 код нулевой длины и D₀ = 0
+    if l > 0:
         D0 = 1 - (math.log2(m) / l)
     else:
         D0 = 0
     
-    # Dₚ = 1 - H(X) / log₂ m - избыточность неравномерности
-    if m > 1:
-        Dp = 1 - (H_X / math.log2(m))
+    Dp, Ds, D = redundancies(H_X, H_Y_X, m)
+    
+    return {
+        'H_X': H_X, 'H_XY': H_XY, 'H_Y_X': H_Y_X, 'I_Y_X': I_Y_X,
+        'm': m, 'l': l, 'D0': D0, 'Dp': Dp, 'Ds': Ds, 'D': D,
+    }
+
+# Столбцы сводной таблицы пакетного режима
+SUMMARY_FIELDS = ('length', 'm', 'H_X', 'H_XY', 'H_Y_X', 'I_Y_X', 'D0', 'Dp', 'Ds', 'D')
+
+def list_input_files(pattern):
+    """Файлы каталога (со всеми подкаталогами) или файлы по шаблону glob, по алфавиту"""
+    if os.path.isdir(pattern):
+        files = [os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names]
     else:
-        Dp = 0
+        files = glob.glob(pattern, recursive=True)
+    return sorted(path for path in files if os.path.isfile(path) and not path.endswith(INDEX_SUFFIX))
+
+def summarize_file(filename):
+    """
+    Сводная строка характеристик одного файла и его частоты в компактной форме
+    (выполняется в рабочем процессе)
+    """
+    stats = analyze_file(filename)
+    row = {'file': filename, 'length': stats.total_chars}
+    if stats.total_chars:
+        c = compute_characteristics(stats)
+        row.update({key: c[key] for key in SUMMARY_FIELDS[1:]})
+    else:
+        # Для пустого текста характеристики не определены
+        row.update({key: None for key in SUMMARY_FIELDS[1:]})
+        row['m'] = 0
+    return row, stats.compact()
+
+def format_summary(row):
+    """Строка сводной таблицы"""
+    values = [f"{row['length']:>12}", f"{row['m']:>6}"]
+    values += [f"{row[key]:>9.4f}" if row[key] is not None else f"{'-':>9}" for key in SUMMARY_FIELDS[2:]]
+    return " ".join(values) + f"  {row['file']}"
+
+def analyze_corpus(pattern, output_file=None, workers=None):
+    """
+    Пакетная обработка набора файлов в пуле процессов: по строке характеристик
+    на файл по мере готовности и итог по всему корпусу. Частоты корпуса —
+    объединение частот файлов, как если бы тексты шли друг за другом.
+    Строки можно записать в CSV (или в JSON Lines для .json/.jsonl).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
     
-    # Dₛ = 1 - H(Y|X) / H(X) - избыточность статистической связи
-    if H_X > 0:
-        Ds = 1 - (H_Y_X / H_X)
+    files = list_input_files(pattern)
+    if not files:
+        print("Файлы не найдены!")
+        return None
+    
+    began = time.perf_counter()
+    header = f"{'Длина':>12} {'m':>6} " + " ".join(f"{key:>9}" for key in SUMMARY_FIELDS[2:]) + "  Файл"
+    print(header)
+    print("-" * len(header))
+    
+    # Частоты объединяются по мере готовности, но в порядке имен файлов, чтобы итог
+    # не зависел от порядка готовности; ждут только файлы, готовые раньше предыдущих
+    corpus = TextStatistics()
+    rows = {}
+    waiting = {}  # имя файла -> частоты в компактной форме или None для пропущенного
+    next_file = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(summarize_file, filename): filename for filename in files}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                row, counts = future.result()
+            except (UnicodeDecodeError, OSError) as error:
+                print(f"Пропущен {filename}: {error}")
+                waiting[filename] = None
+            else:
+                rows[filename] = row
+                waiting[filename] = counts
+                print(format_summary(row), flush=True)
+            
+            while next_file < len(files) and files[next_file] in waiting:
+                counts = waiting.pop(files[next_file])
+                if counts is not None:
+                    corpus.merge_compact(counts)
+                next_file += 1
+    elapsed = time.perf_counter() - began
+    
+    total = {'file': 'ВЕСЬ КОРПУС', 'length': corpus.total_chars, 'm': corpus.alphabet_size}
+    if corpus.total_chars:
+        c = compute_characteristics(corpus)
+        total.update({key: c[key] for key in SUMMARY_FIELDS[1:]})
     else:
-        Ds = 0
+        total.update({key: None for key in SUMMARY_FIELDS[2:]})
+    print("-" * len(header))
+    print(format_summary(total))
+    print(f"Обработано файлов: {len(rows)} из {len(files)} за {elapsed:.2f} с ({len(rows) / elapsed:.1f} файлов/с)")
     
-    # D = Dₚ + Dₛ - Dₚ·Dₛ - полная избыточность
-    D = Dp + Ds - Dp * Ds
+    if output_file is not None:
+        ordered = [rows[filename] for filename in files if filename in rows] + [total]
+        with open(output_file, 'w', encoding='utf-8', newline='', buffering=EXPORT_BUFFER_SIZE) as file:
+            if output_file.lower().endswith(('.json', '.jsonl')):
+                file.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in ordered)
+            else:
+                writer = csv.DictWriter(file, fieldnames=['file', *SUMMARY_FIELDS])
+                writer.writeheader()
+                writer.writerows(ordered)
+        print(f"Сводная таблица записана в {output_file}")
+    return corpus
+
+def top_items(counter, top=None):
+    """
+    Пары (ключ, частота) по убыванию частоты; при равных частотах сохраняется
+    порядок первого вхождения. Для top=K первые K выбираются кучей без полной сортировки.
+    """
+    if top is None:
+        return sorted(counter.items(), key=lambda x: x[1], reverse=True)
+    return heapq.nlargest(top, counter.items(), key=lambda x: x[1])
+
+def format_table(title, items, total, shown_of=None):
+    """Строки таблицы частот; shown_of — общее число строк, если показаны не все"""
+    lines = ["\n" + title]
+    if shown_of is not None:
+        lines[0] += f" (первые {len(items)} из {shown_of})"
+    lines += ["-" * 50, "№   Символ   Частота  Вероятность", "-" * 50]
+    lines += [f"{i+1:<3} {key:<8} {count:<8} {count / total:<12.6f}"
+              for i, (key, count) in enumerate(items)]
+    return lines
+
+def export_tables(stats, filename):
+    """
+    Полные таблицы частот в CSV (или в JSON Lines для .json/.jsonl).
+    Строки записываются пачками через буфер, а не по одной.
+    """
+    as_json = filename.lower().endswith(('.json', '.jsonl'))
+    tables = (('single', stats.single_counter, stats.total_chars),
+              ('pair', stats.pair_counter, stats.total_pairs))
+    
+    with open(filename, 'w', encoding='utf-8', newline='', buffering=EXPORT_BUFFER_SIZE) as file:
+        if as_json:
+            for kind, counter, total in tables:
+                file.writelines(json.dumps({'kind': kind, 'symbol': key, 'count': count,
+                                            'probability': count / total}, ensure_ascii=False) + '\n'
+                                for key, count in counter.items())
+        else:
+            writer = csv.writer(file)
+            writer.writerow(['kind', 'symbol', 'count', 'probability'])
+            for kind, counter, total in tables:
+                writer.writerows((kind, key, count, count / total) for key, count in counter.items())
+
+def print_results(stats, top=None, tables=True):
+    """
+    Вывод таблиц частот и характеристик.
+    top=K — только K самых частых символов и пар, tables=False — без таблиц.
+    """
+    total_chars = stats.total_chars
+    total_pairs = stats.total_pairs
+    
+    c = compute_characteristics(stats)
     
     # Вывод результатов
-    print("\n" + "=" * 40)
-    print("РЕЗУЛЬТАТЫ ОБРАБОТКИ")
-    print("=" * 40)
-    
-    # Одиночные символы
-    print("\nОДИНОЧНЫЕ СИМВОЛЫ")
-    print("-" * 50)
-    print("№   Символ   Частота  Вероятность")
-    print("-" * 50)
-    
-    for i in range(len(sorted_singles)):
-        char = sorted_singles[i][0]
-        count = sorted_singles[i][1]
-        prob = single_probs[char]
-        print(f"{i+1:<3} {char:<8} {count:<8} {prob:<12.6f}")
-    
-    # Пары символов
-    print("\nПАРЫ СИМВОЛОВ")
-    print("-" * 50)
-    print("№   Символ   Частота  Вероятность")
-    print("-" * 50)
-    
-    for i in range(len(sorted_pairs)):
-        pair = sorted_pairs[i][0]
-        count = sorted_pairs[i][1]
-        prob = pair_probs[pair]
-        print(f"{i+1:<3} {pair:<8} {count:<8} {prob:<12.6f}")
+    lines = ["\n" + "=" * 40, "РЕЗУЛЬТАТЫ ОБРАБОТКИ", "=" * 40]
+    
+    if tables:
+        # Одиночные символы и пары символов по убыванию частоты
+        for title, counter, total in (("ОДИНОЧНЫЕ СИМВОЛЫ", stats.single_counter, total_chars),
+                                      ("ПАРЫ СИМВОЛОВ", stats.pair_counter, total_pairs)):
+            shown_of = len(counter) if top is not None and top < len(counter) else None
+            lines += format_table(title, top_items(counter, top), total, shown_of)
+    print("\n".join(lines))
     
     # Статистические характеристики
     print("\nСТАТИСТИЧЕСКИЕ ХАРАКТЕРИСТИКИ")
     print("-" * 40)
-    print(f"Энтропия H(X): {H_X:.6f} бит")
+    print(f"Энтропия H(X): {c['H_X']:.6f} бит")
     print("  H(X) = -Σ p(x)·log₂ p(x)")
-    print(f"Энтропия H(XY): {H_XY:.6f} бит")
+    print(f"Энтропия H(XY): {c['H_XY']:.6f} бит")
     print("  H(XY) = -Σ p(x,y)·log₂ p(x,y)")
-    print(f"Условная энтропия H(Y|X): {H_Y_X:.6f} бит")
+    print(f"Условная энтропия H(Y|X): {c['H_Y_X']:.6f} бит")
     print("  H(Y|X) = H(XY) - H(X)")
-    print(f"Количество информации I(Y,X): {I_Y_X:.6f} бит")
+    print(f"Количество информации I(Y,X): {c['I_Y_X']:.6f} бит")
     print("  I(Y,X) = H(X) - H(Y|X)")
     
     # Избыточности
     print("\nИЗБЫТОЧНОСТИ")
     print("-" * 40)
-    print(f"Избыточность округления D0: {D0:.6f}")
+    print(f"Избыточность округления D0: {c['D0']:.6f}")
     print("  D₀ = 1 - (log₂ m / l)")
-    print(f"Избыточность неравномерности Dp: {Dp:.6f}")
+    print(f"Избыточность неравномерности Dp: {c['Dp']:.6f}")
     print("  Dₚ = 1 - H(X) / log₂ m")
-    print(f"Избыточность статистической связи Ds: {Ds:.6f}")
+    print(f"Избыточность статистической связи Ds: {c['Ds']:.6f}")
     print("  Dₛ = 1 - H(Y|X) / H(X)")
-    print(f"Полная избыточность D: {D:.6f}")
+    print(f"Полная избыточность D: {c['D']:.6f}")
     print("  D = Dₚ + Dₛ - Dₚ·Dₛ")
     
     print(f"\nДлина сообщения: {total_chars} символов")
-    print(f"Количество различных символов: {m}")
-    print(f"Длина равномерного кода: {l}")
+    print(f"Количество различных символов: {c['m']}")
+    print(f"Длина равномерного кода: {c['l']}")
+
+def parse_output_options(args):
+    """
+    Разбор ключей вывода: --top K, --tables ФАЙЛ.csv|.json, --no-tables.
+    Возвращает (оставшиеся аргументы, параметры для report).
+    """
+    options = {'top': None, 'tables': True, 'export': None}
+    rest = []
+    i = 0
+    while i < len(args):
+        if args[i] == "--top" and i + 1 < len(args):
+            options['top'] = int(args[i + 1])
+            i += 2
+        elif args[i] == "--tables" and i + 1 < len(args):
+            options['export'] = args[i + 1]
+            i += 2
+        elif args[i] == "--no-tables":
+            options['tables'] = False
+            i += 1
+        else:
+            rest.append(args[i])
+            i += 1
+    return rest, options
+
+def report(stats, top=None, tables=True, export=None):
+    """Вывод результатов с учетом ключей вывода"""
+    if stats.total_chars == 0:
+        print("Сообщение пустое!")
+        return
+    if export is not None:
+        export_tables(stats, export)
+        print(f"Таблицы частот записаны в {export}")
+    print_results(stats, top, tables)
+
+def main():
+    if len(sys.argv) > 1:
+        args, options = parse_output_options(sys.argv[1:])
+        sys.argv[1:] = args
+        # Если кроме ключей вывода ничего не задано, выводится справка
+        mode = sys.argv[1].lower() if len(sys.argv) > 1 else None
+        if mode == "file" and len(sys.argv) == 3:
+            # Потоковая обработка файла без диалога
+            report(analyze_file(sys.argv[2]), **options)
+        elif mode == "bytes" and len(sys.argv) in (3, 4, 5) \
+                and all(flag.lower() in ("mmap", "unpack") for flag in sys.argv[3:]):
+            # Двоичный файл: символы — байты; сжатый распаковывается только по ключу unpack
+            flags = [flag.lower() for flag in sys.argv[3:]]
+            report(analyze_bytes(sys.argv[2], "mmap" in flags, "unpack" in flags), **options)
+        elif mode == "batch" and len(sys.argv) in (3, 4):
+            # Набор файлов: каталог или шаблон, по строке характеристик на файл
+            analyze_corpus(sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else None)
+        elif mode == "parallel" and len(sys.argv) in (3, 4, 5) \
+                and all(arg.isdigit() or arg.lower() == "serial" for arg in sys.argv[3:]) \
+                and sum(arg.isdigit() for arg in sys.argv[3:]) <= 1:
+            # Параллельная обработка файла; serial — замер последовательного подсчета для ускорения
+            numbers = [int(arg) for arg in sys.argv[3:] if arg.isdigit()]
+            baseline = any(arg.lower() == "serial" for arg in sys.argv[3:])
+            stats = analyze_file_parallel(sys.argv[2], numbers[0] if numbers else None, baseline)
+            report(stats, **options)
+        elif mode == "blocks" and len(sys.argv) in (3, 4):
+            # Блочные энтропии до заданного порядка
+            max_order = int(sys.argv[3]) if len(sys.argv) == 4 else MAX_BLOCK_ORDER
+            blocks = analyze_blocks(sys.argv[2], max_order)
+            if blocks.total_chars == 0:
+                print("Сообщение пустое!")
+                return
+            print(f"Длина сообщения: {blocks.total_chars} символов")
+            print_block_entropies(blocks)
+        elif mode == "index" and len(sys.argv) == 3:
+            # Подсчет с индексом: повторный запуск дочитывает только дописанный хвост
+            stats, reused, scanned = analyze_file_indexed(sys.argv[2])
+            print(f"Из индекса: {reused} байт, дочитано: {scanned} байт")
+            report(stats, **options)
+        elif mode in ("monitor", "tail") and len(sys.argv) in (3, 4, 5):
+            # Энтропия скользящего окна по stdin или по (растущему) файлу
+            window = int(sys.argv[3]) if len(sys.argv) >= 4 else MONITOR_WINDOW
+            cadence = int(sys.argv[4]) if len(sys.argv) == 5 else MONITOR_CADENCE
+            follow = mode == "tail"
+            if sys.argv[2] == "-":
+                monitor_stream(sys.stdin.buffer, window, cadence, follow)
+            elif follow:
+                with open(sys.argv[2], 'rb') as file:
+                    monitor_stream(file, window, cadence, follow)
+            else:
+                with open_input(sys.argv[2], text=False) as file:
+                    monitor_stream(file, window, cadence)
+        else:
+            print("Использование:")
+            print("  python main.py                          - диалоговый режим")
+            print("  python main.py file file.txt            - обработка файла без диалога")
+            print("  python main.py bytes file.bin [mmap] [unpack] - байтовый режим для двоичных файлов")
+            print("                                            (unpack - распаковать .gz/.bz2/.xz)")
+            print("  python main.py batch DIR|'*.txt' [out.csv] - сводка по набору файлов и по корпусу")
+            print("  python main.py parallel file.txt [N] [serial] - параллельная обработка файла в N процессах")
+            print("                                            (serial - замерить последовательный подсчет и ускорение)")
+            print("  python main.py blocks file.txt [k]      - блочные энтропии H(X₁..Xₖ) до порядка k")
+            print("  python main.py index file.txt           - подсчет с индексом частот рядом с файлом")
+            print("  python main.py monitor file.txt|- [W] [C] - энтропия окна из W символов каждые C символов")
+            print("  python main.py tail file.txt [W] [C]    - то же для растущего файла (до Ctrl+C)")
+            print("Ключи вывода для file, bytes, parallel и index:")
+            print("  --top K             - только K самых частых символов и пар")
+            print("  --tables out.csv    - полные таблицы в CSV (out.json - в JSON Lines)")
+            print("  --no-tables         - только характеристики, без таблиц")
+        return
+    
+    print("1 - Ввод с клавиатуры")
+    print("2 - Загрузка из файла")
+    choice = input("Выбор: ")
+    
+    if choice == "1":
+        message = input("Введите сообщение: ")
+        stats = TextStatistics().update(message)
+    elif choice == "2":
+        filename = input("Введите имя файла: ")
+        try:
+            # Файл читается блоками (сжатые .gz/.bz2/.xz распаковываются на лету),
+            # поэтому размер файла не ограничен объемом памяти
+            stats = analyze_file(filename)
+        except FileNotFoundError:
+            print("Файл не найден!")
+            return
+    else:
+        print("Неверный выбор!")
+        return
+    
+    if stats.total_chars == 0:
+        print("Сообщение пустое!")
+        return
+    
+    print_results(stats)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
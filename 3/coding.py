@@ -0,0 +1,505 @@
+import heapq
+import time
+
+# Ограничение длины кода по умолчанию для канонического кода Хаффмана
+MAX_CODE_LENGTH = 12
+
+# Кодировщик переводит текст в байты блоками по столько символов
+ENCODE_BLOCK = 1 << 14
+
+# Ширина первичной таблицы декодера в битах
+PRIMARY_BITS = 12
+
+class Node:
+    def __init__(self, char, freq, index):
+        self.char = char
+        self.freq = freq
+        self.index = index
+        self.left = None
+        self.right = None
+        self.code = ''
+        self.descendant_count = 0  # Количество потомков
+
+class HuffmanCoding:
+    def __init__(self):
+        self.codes = {}
+    
+    def count_descendants(self, node):
+        if node is None:
+            return 0
+        if node.char is not None:
+            node.descendant_count = 0
+            return 1
+        
+        left_count = self.count_descendants(node.left)
+        right_count = self.count_descendants(node.right)
+        node.descendant_count = left_count + right_count
+        return node.descendant_count
+    
+    def leaf_count(self, node):
+        """Число листьев поддерева: лист считается за одного, у внутреннего узла — его потомки"""
+        return 1 if node.char is not None else node.descendant_count
+    
+    def get_node_priority(self, node):
+        """Определяет приоритет узла для сравнения"""
+        # Основной критерий - частота (меньшая частота имеет высший приоритет)
+        # При одинаковой частоте - узел с большим количеством потомков имеет высший приоритет
+        # При одинаковом количестве потомков - узел с большим индексом (позже в таблице) имеет высший приоритет
+        return (node.freq, -node.descendant_count, -node.index)
+    
+    def build_tree(self, frequencies):
+        """
+        Построение дерева Хаффмана с очередью с приоритетом.
+        
+        Приоритет узла тот же, что в get_node_priority: (частота, -потомки, -индекс).
+        Индексы живых узлов различны (индекс объединенного узла — наименьший индекс
+        листа в его поддереве), поэтому порядок извлечения совпадает с порядком
+        полной сортировки на каждом шаге. Число потомков объединенного узла
+        (листьев в поддереве) считается сразу при объединении, а не обходом дерева.
+        Сложность O(n log n).
+        """
+        # Создаем узлы с сохранением индекса из исходного списка
+        heap = []
+        for i, (char, freq) in enumerate(frequencies):
+            node = Node(char, freq, i)
+            heap.append((self.get_node_priority(node), node))
+        heapq.heapify(heap)
+        
+        # Строим дерево снизу вверх
+        while len(heap) > 1:
+            # Берем два узла с наивысшим приоритетом (наименьшая частота)
+            _, left = heapq.heappop(heap)
+            _, right = heapq.heappop(heap)
+            
+            # Создаем новый узел
+            # Индекс нового узла = минимальный из индексов детей
+            # Это сохраняет приоритет узлов, которые были раньше в таблице
+            merged = Node(None, left.freq + right.freq, min(left.index, right.index))
+            merged.left = left
+            merged.right = right
+            merged.descendant_count = self.leaf_count(left) + self.leaf_count(right)
+            
+            # Добавляем новый узел обратно в очередь
+            heapq.heappush(heap, (self.get_node_priority(merged), merged))
+        
+        return heap[0][1] if heap else None
+    
+    def generate_codes(self, node, current_code=''):
+        # Обход в глубину со стеком вместо рекурсии: у вырожденного дерева
+        # глубина равна числу символов и превышает предел рекурсии
+        stack = [(node, current_code)]
+        while stack:
+            node, current_code = stack.pop()
+            if node is None:
+                continue
+            
+            if node.char is not None:
+                self.codes[node.char] = current_code
+                continue
+            
+            stack.append((node.right, current_code + '1'))
+            stack.append((node.left, current_code + '0'))
+
+class CanonicalHuffmanCoding:
+    """
+    Канонический код Хаффмана: коды восстанавливаются по одним длинам.
+    
+    Символы упорядочиваются по (длина, позиция в таблице частот), и коды
+    выдаются подряд: следующий код — предыдущий плюс единица, сдвинутый
+    влево при росте длины. Поэтому кодовую книгу достаточно хранить как
+    таблицу «символ — длина». При max_length длины ограничиваются
+    алгоритмом package-merge, который дает оптимальный код среди кодов
+    с длиной не больше max_length.
+    """
+    
+    def __init__(self, max_length=None):
+        self.max_length = max_length
+        self.lengths = {}
+        self.codes = {}
+    
+    def build(self, frequencies):
+        """Длины и канонические коды по списку (символ, частота)"""
+        if self.max_length is None:
+            huffman = HuffmanCoding()
+            huffman.generate_codes(huffman.build_tree(frequencies))
+            # Единственному символу нужен хотя бы один бит, иначе поток не декодировать
+            self.lengths = {char: max(len(huffman.codes[char]), 1) for char, _ in frequencies}
+        else:
+            self.lengths = self.package_merge(frequencies, self.max_length)
+        self.codes = self.codes_from_lengths(self.lengths)
+        return self.codes
+    
+    def package_merge(self, frequencies, max_length):
+        """
+        Оптимальные длины кодов не длиннее max_length (алгоритм package-merge).
+        
+        На каждом из max_length - 1 уровней соседние по весу элементы попарно
+        объединяются в пакеты, и пакеты сливаются с листьями. Из итогового
+        списка берутся 2n - 2 самых легких элемента; длина кода символа равна
+        числу выбранных элементов, в которые он входит.
+        """
+        n = len(frequencies)
+        if n == 0:
+            return {}
+        if n == 1:
+            return {frequencies[0][0]: 1}
+        if max_length < 1 or (1 << max_length) < n:
+            raise ValueError(f"{n} символов нельзя закодировать кодами длиной не больше {max_length}")
+        
+        # Элемент: (вес, номер символа для листа или None, левый, правый)
+        leaves = sorted(((freq, i, None, None) for i, (_, freq) in enumerate(frequencies)),
+                        key=lambda item: item[0])
+        items = leaves
+        for _ in range(max_length - 1):
+            packages = [(items[j][0] + items[j + 1][0], None, items[j], items[j + 1])
+                        for j in range(0, len(items) - 1, 2)]
+            items = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+        
+        counts = [0] * n
+        stack = items[:2 * n - 2]
+        while stack:
+            _, symbol, left, right = stack.pop()
+            if symbol is not None:
+                counts[symbol] += 1
+            else:
+                stack.append(left)
+                stack.append(right)
+        return {char: counts[i] for i, (char, _) in enumerate(frequencies)}
+    
+    @staticmethod
+    def codes_from_lengths(lengths):
+        """Канонические коды по таблице {символ: длина} (порядок таблицы задает порядок равных длин)"""
+        symbols = sorted(enumerate(lengths.items()), key=lambda item: (item[1][1], item[0]))
+        codes = {}
+        code = 0
+        previous = 0
+        for _, (char, length) in symbols:
+            code <<= length - previous
+            codes[char] = format(code, f'0{length}b') if length else ''
+            code += 1
+            previous = length
+        return {char: codes[char] for char in lengths}
+    
+    def serialize_lengths(self):
+        """Кодовая книга как список (символ, длина) в порядке таблицы частот"""
+        return list(self.lengths.items())
+    
+    @classmethod
+    def from_lengths(cls, table):
+        """Восстановление кодов по списку (символ, длина)"""
+        coding = cls()
+        coding.lengths = dict(table)
+        coding.codes = cls.codes_from_lengths(coding.lengths)
+        return coding
+
+def average_code_length(frequencies, codes):
+    """Средняя длина кода в битах на символ"""
+    total = sum(freq for _, freq in frequencies)
+    return sum(freq * len(codes[char]) for char, freq in frequencies) / total if total else 0.0
+
+def length_limit_cost(frequencies, max_length=MAX_CODE_LENGTH):
+    """
+    Цена ограничения длины: средняя длина кода Хаффмана без ограничения и
+    с ограничением max_length, наибольшие длины и относительный прирост.
+    """
+    free = CanonicalHuffmanCoding()
+    free.build(frequencies)
+    limited = CanonicalHuffmanCoding(max_length)
+    limited.build(frequencies)
+    free_average = average_code_length(frequencies, free.codes)
+    limited_average = average_code_length(frequencies, limited.codes)
+    return {
+        'free_average': free_average,
+        'limited_average': limited_average,
+        'free_max_length': max(free.lengths.values(), default=0),
+        'limited_max_length': max(limited.lengths.values(), default=0),
+        'increase': (limited_average / free_average - 1) * 100 if free_average else 0.0,
+    }
+
+class BitEncoder:
+    """
+    Кодирование текста в упакованный поток битов по кодовой книге {символ: '0101'}.
+    
+    Текст кодируется блоками по ENCODE_BLOCK символов: коды блока склеиваются,
+    переводятся в одно целое (накопитель) и целыми байтами переносятся в bytearray,
+    а неполный последний байт остается до следующего блока. Так память
+    пропорциональна размеру сжатого потока, а не числу битов.
+    Биты пишутся от старшего к младшему, последний байт дополняется нулями.
+    """
+    
+    def __init__(self, codes):
+        self.codes = codes
+        self.buffer = bytearray()
+        self.pending = ''  # меньше 8 битов, еще не попавших в буфер
+        self.flushed = 0   # битов, перенесенных в буфер
+    
+    @property
+    def bit_length(self):
+        """Точная длина закодированного потока в битах (без дополнения)"""
+        return self.flushed + len(self.pending)
+    
+    def encode(self, text):
+        """Дописывание кодов символов text; можно вызывать блоками"""
+        code_of = self.codes.__getitem__
+        for start in range(0, len(text), ENCODE_BLOCK):
+            bits = self.pending + ''.join(map(code_of, text[start:start + ENCODE_BLOCK]))
+            size = len(bits) >> 3
+            if size:
+                # Целое из битов блока переводится в байты с сохранением ведущих нулей
+                self.buffer += int(bits[:size * 8], 2).to_bytes(size, 'big')
+                self.flushed += size * 8
+            self.pending = bits[size * 8:]
+        return self
+    
+    def take(self):
+        """Готовые целые байты с начала потока (для записи по частям)"""
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+    
+    def finish(self):
+        """Оставшиеся байты с дополнением последнего байта нулями"""
+        if self.pending:
+            self.buffer += int(self.pending.ljust(8, '0'), 2).to_bytes(1, 'big')
+            self.flushed += len(self.pending)
+            self.pending = ''
+        return self.take()
+
+class TableDecoder:
+    """
+    Табличный декодер префиксного кода (Хаффмана, Шеннона-Фано или канонического).
+    
+    Первичная таблица индексируется следующими PRIMARY_BITS битами потока.
+    Ее элемент — (символы, битов, None): все коды, целиком уместившиеся в эти
+    биты, раскодированы заранее, так что за шаг снимается сразу несколько
+    символов. Если первый код длиннее окна, элемент — ('', 0, (таблица, ширина)):
+    вторичная таблица по следующим битам (при необходимости с таблицами
+    следующего уровня). Дерево по одному биту не обходится.
+    Элемент ('', 0, None) означает, что с этих битов не начинается ни один код:
+    на таком элементе декодирование останавливается с ошибкой ValueError.
+    """
+    
+    def __init__(self, codes, primary_bits=PRIMARY_BITS):
+        self.codes = codes
+        self.symbol_of = {(len(code), int(code, 2)): char for char, code in codes.items() if code}
+        self.max_length = max((len(code) for code in codes.values()), default=0)
+        # Для каждого собственного префикса кода: наибольшая длина кода с этим префиксом
+        self.longest = {}
+        for code in codes.values():
+            for length in range(1, len(code)):
+                key = (length, int(code[:length], 2))
+                self.longest[key] = max(self.longest.get(key, 0), len(code))
+        self.primary_bits = primary_bits
+        self.table = self.build_table(0, 0, primary_bits, multiple=True)
+    
+    def build_table(self, prefix, prefix_length, width, multiple=False):
+        """
+        Таблица для кодов, начинающихся с prefix длины prefix_length, по следующим width битам.
+        multiple=True — раскодировать в элементе все уместившиеся коды, а не только первый.
+        """
+        symbol_of = self.symbol_of
+        table = []
+        for index in range(1 << width):
+            symbols = []
+            used = 0
+            sub = None
+            while used < width:
+                # Поиск кода, который начинается в позиции used окна
+                found = None
+                start_prefix, start_length = (prefix, prefix_length) if used == 0 else (0, 0)
+                for length in range(1, width - used + 1):
+                    value = (start_prefix << length) | ((index >> (width - used - length)) & ((1 << length) - 1))
+                    char = symbol_of.get((start_length + length, value))
+                    if char is not None:
+                        found = (char, length)
+                        break
+                if found is None:
+                    longest = self.longest.get((prefix_length + width, (prefix << width) | index))
+                    if used == 0 and longest is not None:
+                        # Первый код длиннее окна: вторичная таблица по следующим битам
+                        sub_width = min(longest - prefix_length - width, self.primary_bits)
+                        sub = (self.build_table((prefix << width) | index, prefix_length + width, sub_width),
+                               sub_width)
+                    break
+                symbols.append(found[0])
+                used += found[1]
+                if not multiple:
+                    break
+            table.append((''.join(symbols), used, sub))
+        return table
+    
+    def decode(self, data, bit_length, count=None):
+        """
+        Декодирование bit_length битов упакованного потока data.
+        count — число символов; нужно только для кода из одного символа с пустым кодом.
+        """
+        if self.max_length == 0:
+            return next(iter(self.codes), '') * (count or 0)
+        
+        K = self.primary_bits
+        mask = (1 << K) - 1
+        table = self.table
+        need = max(K, self.max_length)
+        out = []
+        append = out.append
+        accumulator = 0
+        available = 0  # битов в накопителе
+        position = 0   # байтов прочитано
+        
+        # Быстрый путь: в накопитель подгружаются только байты целиком внутри потока,
+        # и окно декодера никогда не заходит за его конец
+        full_bytes = bit_length >> 3
+        while position + 8 <= full_bytes:
+            accumulator = ((accumulator & ((1 << available) - 1)) << 64) | \
+                int.from_bytes(data[position:position + 8], 'big')
+            available += 64
+            position += 8
+            while available >= need:
+                symbols, used, sub = table[(accumulator >> (available - K)) & mask]
+                if sub is None:
+                    if not used:
+                        raise ValueError("Поток содержит последовательность битов, не являющуюся кодом")
+                    append(symbols)
+                    available -= used
+                    continue
+                available -= K
+                while sub is not None:
+                    sub_table, width = sub
+                    symbols, used, sub = sub_table[(accumulator >> (available - width)) & ((1 << width) - 1)]
+                    if sub is None and not used:
+                        raise ValueError("Поток содержит последовательность битов, не являющуюся кодом")
+                    available -= width if sub is not None else used
+                append(symbols)
+        
+        # Хвост короче окна разбирается по одному коду
+        consumed = position * 8 - available
+        out.append(self.decode_tail(data, consumed, bit_length))
+        return ''.join(out)
+    
+    def decode_tail(self, data, start, bit_length):
+        """Медленное декодирование битов [start, bit_length) по словарю кодов"""
+        symbol_of = self.symbol_of
+        symbols = []
+        value = 0
+        length = 0
+        for bit_index in range(start, bit_length):
+            value = (value << 1) | ((data[bit_index >> 3] >> (7 - (bit_index & 7))) & 1)
+            length += 1
+            char = symbol_of.get((length, value))
+            if char is not None:
+                symbols.append(char)
+                value = 0
+                length = 0
+        if length:
+            raise ValueError("Поток обрывается посреди кода")
+        return ''.join(symbols)
+
+def round_trip(message, codes):
+    """
+    Проверка кодирования и декодирования сообщения: совпадение и скорость.
+    Скорость — мегабайты исходного текста в UTF-8 в секунду.
+    """
+    size = len(message.encode('utf-8')) / 2**20
+    start = time.perf_counter()
+    data, bit_length = encode_message(message, codes)
+    encode_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    decoder = TableDecoder(codes)
+    table_time = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = decoder.decode(data, bit_length, len(message))
+    decode_time = time.perf_counter() - start
+    
+    return {
+        'ok': decoded == message,
+        'bit_length': bit_length,
+        'encode_speed': size / encode_time if encode_time else float('inf'),
+        'decode_speed': size / decode_time if decode_time else float('inf'),
+        'table_time': table_time,
+    }
+
+def encode_message(message, codes):
+    """Упакованный поток битов сообщения и его точная длина в битах"""
+    encoder = BitEncoder(codes).encode(message)
+    bit_length = encoder.bit_length
+    return encoder.finish(), bit_length
+
+def write_bitstream(filename, data, bit_length):
+    """Запись потока в файл: длина в битах (8 байт, big-endian), затем сами байты"""
+    with open(filename, 'wb') as file:
+        file.write(bit_length.to_bytes(8, 'big'))
+        file.write(data)
+
+def bits_preview(data, bit_length, limit):
+    """Первые limit битов потока строкой из '0' и '1' (для показа)"""
+    shown = min(bit_length, limit)
+    if shown == 0:
+        return ''
+    head = int.from_bytes(data[:(shown + 7) // 8], 'big')
+    return format(head, f'0{(shown + 7) // 8 * 8}b')[:shown]
+
+class ShannonFanoCoding:
+    def __init__(self):
+        self.codes = {}
+        self.steps = []
+    
+    def build_tree(self, frequencies):
+        sorted_freq = self.custom_sort(frequencies)
+        self._generate_codes_recursive(sorted_freq, '')
+        return self.codes
+    
+    def custom_sort(self, frequencies):
+        freq_dict = dict(frequencies)
+        char_order = {}
+        order = 0
+        for char, _ in frequencies:
+            if char not in char_order:
+                char_order[char] = order
+                order += 1
+        
+        return sorted(frequencies, key=lambda x: (-x[1], char_order[x[0]]))
+    
+    def _generate_codes_recursive(self, symbols, current_code):
+        if len(symbols) == 1:
+            self.codes[symbols[0][0]] = current_code
+            return
+        
+        total_freq = sum(freq for _, freq in symbols)
+        
+        # Ищем оптимальное разделение по минимальной разнице частот
+        best_diff = float('inf')
+        best_index = 0
+        current_freq = 0
+        
+        # Перебираем все возможные точки разделения
+        for i in range(len(symbols)):
+            current_freq += symbols[i][1]
+            other_freq = total_freq - current_freq
+            
+            # Вычисляем абсолютную разницу частот между группами
+            diff = abs(current_freq - other_freq)
+            
+            # Если нашли разбиение с меньшей разницей, обновляем
+            if diff < best_diff:
+                best_diff = diff
+                best_index = i + 1
+        
+        # Разделяем на две группы в найденной оптимальной точке
+        group1 = symbols[:best_index]
+        group2 = symbols[best_index:]
+        
+        sum1 = sum(freq for _, freq in group1)
+        sum2 = sum(freq for _, freq in group2)
+        
+        self.steps.append({
+            'group1': group1.copy(),
+            'group2': group2.copy(),
+            'sum1': sum1,
+            'sum2': sum2,
+            'code1': current_code + '0',
+            'code2': current_code + '1'
+        })
+        
+        self._generate_codes_recursive(group1, current_code + '0')
+        self._generate_codes_recursive(group2, current_code + '1')
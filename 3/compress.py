@@ -0,0 +1,178 @@
+import struct
+import sys
+import time
+from collections import Counter
+
+from coding import (ShannonFanoCoding, CanonicalHuffmanCoding, BitEncoder, TableDecoder,
+                    average_code_length)
+
+# Файл читается блоками по столько байтов; каждый блок кодируется в отдельный кадр
+CHUNK_SIZE = 1 << 20
+
+# Заголовок контейнера: сигнатура, версия, способ кодирования, вид кодовой книги,
+# размер исходного файла в байтах, число записей кодовой книги
+MAGIC = b'ITLC'
+VERSION = 1
+HEADER = struct.Struct('>4sBBBQH')
+
+# Кадр: число символов и длина потока в битах, затем (длина + 7) // 8 байтов
+FRAME = struct.Struct('>IQ')
+
+METHODS = {'huffman': 0, 'shannon-fano': 1}
+CANONICAL_LENGTHS = 0  # кодовая книга — таблица (символ, длина) канонического кода
+EXPLICIT_CODES = 1     # кодовая книга — таблица (символ, длина, код)
+
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Блоки файла как строки: байты переводятся в символы с кодами 0..255 (latin-1),
+    так что символ сообщения — байт, и любой файл восстанавливается побайтно.
+    """
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        yield data.decode('latin-1')
+
+def count_frequencies(filename):
+    """
+    Первый проход: частоты символов блоками.
+    Порядок как в CodingApp.calculate_frequencies: по убыванию частоты,
+    при равенстве — по первому вхождению.
+    """
+    counter = Counter()
+    with open(filename, 'rb') as file:
+        for chunk in read_chunks(file):
+            counter.update(chunk)
+    return sorted(counter.items(), key=lambda x: -x[1])
+
+def build_codebook(frequencies, method, max_length=None):
+    """Коды и вид кодовой книги для способа кодирования"""
+    if not frequencies:
+        return {}, CANONICAL_LENGTHS
+    if method == 'huffman':
+        coding = CanonicalHuffmanCoding(max_length)
+        coding.build(frequencies)
+        return coding.codes, CANONICAL_LENGTHS
+    return ShannonFanoCoding().build_tree(frequencies), EXPLICIT_CODES
+
+def write_codebook(file, codes, kind):
+    """Кодовая книга: для канонического кода — только длины, иначе еще и сами коды"""
+    for char, code in codes.items():
+        file.write(struct.pack('>BB', ord(char), len(code)))
+        if kind == EXPLICIT_CODES and code:
+            file.write(int(code, 2).to_bytes((len(code) + 7) // 8, 'big'))
+
+def read_codebook(file, entries, kind):
+    """Чтение кодовой книги, записанной write_codebook"""
+    table = []
+    for _ in range(entries):
+        symbol, length = struct.unpack('>BB', read_exact(file, 2))
+        if kind == EXPLICIT_CODES:
+            value = int.from_bytes(read_exact(file, (length + 7) // 8), 'big') if length else 0
+            table.append((chr(symbol), format(value, f'0{length}b') if length else ''))
+        else:
+            table.append((chr(symbol), length))
+    if kind == CANONICAL_LENGTHS:
+        return CanonicalHuffmanCoding.from_lengths(table).codes
+    return dict(table)
+
+def read_exact(file, size):
+    """Ровно size байтов или ошибка о поврежденном файле"""
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("Файл поврежден: неожиданный конец данных")
+    return data
+
+def compress(source, target, method='huffman', max_length=None):
+    """
+    Сжатие файла: проход подсчета частот, построение кодов, затем
+    кодирование блоками в кадры контейнера. Память — на один блок.
+    """
+    start = time.perf_counter()
+    frequencies = count_frequencies(source)
+    codes, kind = build_codebook(frequencies, method, max_length)
+    size = sum(freq for _, freq in frequencies)
+    counted = time.perf_counter()
+    
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        dst.write(HEADER.pack(MAGIC, VERSION, METHODS[method], kind, size, len(codes)))
+        write_codebook(dst, codes, kind)
+        for chunk in read_chunks(src):
+            encoder = BitEncoder(codes).encode(chunk)
+            bit_length = encoder.bit_length
+            dst.write(FRAME.pack(len(chunk), bit_length))
+            dst.write(encoder.finish())
+        compressed = dst.tell()
+    
+    elapsed = time.perf_counter() - start
+    return {
+        'size': size,
+        'compressed': compressed,
+        'alphabet': len(codes),
+        'average': average_code_length(frequencies, codes),
+        'count_time': counted - start,
+        'time': elapsed,
+    }
+
+def decompress(source, target):
+    """Распаковка контейнера: кадры декодируются табличным декодером по одному"""
+    start = time.perf_counter()
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        magic, version, method, kind, size, entries = HEADER.unpack(read_exact(src, HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Это не файл, сжатый compress.py")
+        decoder = TableDecoder(read_codebook(src, entries, kind))
+        
+        written = 0
+        while True:
+            header = src.read(FRAME.size)
+            if not header:
+                break
+            if len(header) != FRAME.size:
+                raise ValueError("Файл поврежден: неполный заголовок кадра")
+            count, bit_length = FRAME.unpack(header)
+            data = read_exact(src, (bit_length + 7) // 8)
+            chunk = decoder.decode(data, bit_length, count)
+            if len(chunk) != count:
+                raise ValueError("Файл поврежден: число символов кадра не совпадает")
+            dst.write(chunk.encode('latin-1'))
+            written += count
+    
+    if written != size:
+        raise ValueError(f"Файл поврежден: восстановлено {written} байт из {size}")
+    return {'size': size, 'time': time.perf_counter() - start}
+
+def main():
+    args = sys.argv[1:]
+    try:
+        run(args)
+    except (OSError, ValueError) as error:
+        print(f"Ошибка: {error}")
+        sys.exit(1)
+
+def run(args):
+    if len(args) == 5 and args[0] == "compress" and args[3] == 'shannon-fano':
+        # Ограничение длины кода есть только у канонического кода Хаффмана
+        raise ValueError("наибольшая длина кода L задается только для huffman")
+    elif len(args) in (3, 4, 5) and args[0] == "compress" and (len(args) < 4 or args[3] in METHODS):
+        method = args[3] if len(args) >= 4 else 'huffman'
+        max_length = int(args[4]) if len(args) == 5 else None
+        result = compress(args[1], args[2], method, max_length)
+        speed = result['size'] / 2**20 / result['time'] if result['time'] else 0.0
+        ratio = result['compressed'] / result['size'] if result['size'] else 0.0
+        print(f"Исходный размер: {result['size']} байт, алфавит: {result['alphabet']} символов")
+        print(f"Сжатый размер: {result['compressed']} байт ({ratio:.2%} исходного), "
+              f"средняя длина кода: {result['average']:.4f} бит/символ")
+        print(f"Время: {result['time']:.2f} с (подсчет частот {result['count_time']:.2f} с), {speed:.1f} МБ/с")
+    elif len(args) == 3 and args[0] == "decompress":
+        result = decompress(args[1], args[2])
+        speed = result['size'] / 2**20 / result['time'] if result['time'] else 0.0
+        print(f"Восстановлено {result['size']} байт за {result['time']:.2f} с, {speed:.1f} МБ/с")
+    else:
+        print("Использование:")
+        print("  python compress.py compress file out.itlc [huffman|shannon-fano] [L]"
+              "  - сжатие (L - наибольшая длина кода Хаффмана)")
+        print("  python compress.py decompress out.itlc file  - распаковка")
+
+if __name__ == "__main__":
+    main()
@@ -3,149 +3,11 @@ from tkinter import ttk, filedialog, messagebox
 from collections import Counter, defaultdict
 import math
 
-class Node:
-    def __init__(self, char, freq, index):
-        self.char = char
-        self.freq = freq
-        self.index = index
-        self.left = None
-        self.right = None
-        self.code = ''
-        self.descendant_count = 0  # Количество потомков
+from coding import (HuffmanCoding, ShannonFanoCoding, MAX_CODE_LENGTH, length_limit_cost,
+                    encode_message, write_bitstream, bits_preview, round_trip)
 
-class HuffmanCoding:
-    def __init__(self):
-        self.codes = {}
-    
-    def count_descendants(self, node):
-        if node is None:
-            return 0
-        if node.char is not None:
-            node.descendant_count = 0
-            return 1
-        
-        left_count = self.count_descendants(node.left)
-        right_count = self.count_descendants(node.right)
-        node.descendant_count = left_count + right_count
-        return node.descendant_count
-    
-    def get_node_priority(self, node):
-        """Определяет приоритет узла для сравнения"""
-        # Основной критерий - частота (меньшая частота имеет высший приоритет)
-        # При одинаковой частоте - узел с большим количеством потомков имеет высший приоритет
-        # При одинаковом количестве потомков - узел с большим индексом (позже в таблице) имеет высший приоритет
-        return (node.freq, -node.descendant_count, -node.index)
-    
-    def build_tree(self, frequencies):
-        # Создаем узлы с сохранением индекса из исходного списка
-        nodes = []
-        for i, (char, freq) in enumerate(frequencies):
-            node = Node(char, freq, i)
-            nodes.append(node)
-        
-        # Строим дерево снизу вверх
-        step = 0
-        while len(nodes) > 1:
-            # Пересчитываем количество потомков для всех узлов
-            for node in nodes:
-                self.count_descendants(node)
-            
-            # Сортируем узлы по приоритету
-            nodes.sort(key=self.get_node_priority)
-            
-            # Берем два узла с наивысшим приоритетом (наименьшая частота)
-            left = nodes.pop(0)
-            right = nodes.pop(0)
-            
-            # Создаем новый узел
-            # Индекс нового узла = минимальный из индексов детей
-            # Это сохраняет приоритет узлов, которые были раньше в таблице
-            merged = Node(None, left.freq + right.freq, min(left.index, right.index))
-            merged.left = left
-            merged.right = right
-            
-            # Добавляем новый узел обратно в список
-            nodes.append(merged)
-            step += 1
-        
-        return nodes[0] if nodes else None
-    
-    def generate_codes(self, node, current_code=''):
-        if node is None:
-            return
-        
-        if node.char is not None:
-            self.codes[node.char] = current_code
-            return
-        
-        self.generate_codes(node.left, current_code + '0')
-        self.generate_codes(node.right, current_code + '1')
-
-class ShannonFanoCoding:
-    def __init__(self):
-        self.codes = {}
-        self.steps = []
-    
-    def build_tree(self, frequencies):
-        sorted_freq = self.custom_sort(frequencies)
-        self._generate_codes_recursive(sorted_freq, '')
-        return self.codes
-    
-    def custom_sort(self, frequencies):
-        freq_dict = dict(frequencies)
-        char_order = {}
-        order = 0
-        for char, _ in frequencies:
-            if char not in char_order:
-                char_order[char] = order
-                order += 1
-        
-        return sorted(frequencies, key=lambda x: (-x[1], char_order[x[0]]))
-    
-    def _generate_codes_recursive(self, symbols, current_code):
-        if len(symbols) == 1:
-            self.codes[symbols[0][0]] = current_code
-            return
-        
-        total_freq = sum(freq for _, freq in symbols)
-        
-        # Ищем оптимальное разделение по минимальной разнице частот
-        best_diff = float('inf')
-        best_index = 0
-        current_freq = 0
-        
-        # Перебираем все возможные точки разделения
-        for i in range(len(symbols)):
-            current_freq += symbols[i][1]
-            other_freq = total_freq - current_freq
-            
-            # Вычисляем абсолютную разницу частот между группами
-            diff = abs(current_freq - other_freq)
-            
-            # Если нашли разбиение с меньшей разницей, обновляем
-            if diff < best_diff:
-                best_diff = diff
-                best_index = i + 1
-        
-        # Разделяем на две группы в найденной оптимальной точке
-        group1 = symbols[:best_index]
-        group2 = symbols[best_index:]
-        
-        sum1 = sum(freq for _, freq in group1)
-        sum2 = sum(freq for _, freq in group2)
-        
-        self.steps.append({
-            'group1': group1.copy(),
-            'group2': group2.copy(),
-            'sum1': sum1,
-            'sum2': sum2,
-            'code1': current_code + '0',
-            'code2': current_code + '1'
-        })
-        
-        self._generate_codes_recursive(group1, current_code + '0')
-        self._generate_codes_recursive(group2, current_code + '1')
-      
+# Сколько битов закодированного сообщения показывать в окне
+DISPLAY_BITS = 100000
 
 class CodingApp:
     def __init__(self, root):
@@ -157,6 +19,9 @@ class CodingApp:
         self.frequencies = []
         self.shannon_fano_codes = {}
         self.huffman_codes = {}
+        # Упакованные потоки: (байты, длина в битах)
+        self.sf_stream = (b'', 0)
+        self.huff_stream = (b'', 0)
         
         self.setup_ui()
     
@@ -298,6 +163,13 @@ class CodingApp:
         self.huff_encoded = tk.Text(results_frame, height=3, width=100)
         self.huff_encoded.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E))
         
+        save_frame = ttk.Frame(results_frame)
+        save_frame.grid(row=6, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Button(save_frame, text="Сохранить код Шеннона-Фано",
+                  command=lambda: self.save_stream(self.sf_stream)).grid(row=0, column=0, padx=(0, 10))
+        ttk.Button(save_frame, text="Сохранить код Хаффмана",
+                  command=lambda: self.save_stream(self.huff_stream)).grid(row=0, column=1)
+        
         # Статистика
         stats_frame = ttk.LabelFrame(scrollable_frame, text="Статистика", padding="10")
         stats_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
@@ -347,6 +219,24 @@ class CodingApp:
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось загрузить файл: {str(e)}")
     
+    def save_stream(self, stream):
+        data, bit_length = stream
+        if not bit_length:
+            messagebox.showwarning("Предупреждение", "Сначала выполните анализ сообщения")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Сохранить закодированное сообщение",
+            defaultextension=".bin",
+            filetypes=(("Двоичные файлы", "*.bin"), ("Все файлы", "*.*"))
+        )
+        
+        if filename:
+            try:
+                write_bitstream(filename, data, bit_length)
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {str(e)}")
+    
     def analyze(self):
         self.message = self.text_input.get('1.0', tk.END).strip()
         
@@ -481,13 +371,13 @@ class CodingApp:
         # Исходное сообщение
         self.original_message.insert('1.0', self.message)
         
-        # Кодирование Шеннона-Фано
-        sf_encoded = ''.join(self.shannon_fano_codes[char] for char in self.message)
-        self.sf_encoded.insert('1.0', sf_encoded)
+        # Кодирование Шеннона-Фано и Хаффмана в упакованные потоки битов;
+        # в окне показываются только первые DISPLAY_BITS битов
+        self.sf_stream = encode_message(self.message, self.shannon_fano_codes)
+        self.sf_encoded.insert('1.0', bits_preview(*self.sf_stream, DISPLAY_BITS))
         
-        # Кодирование Хаффмана
-        huff_encoded = ''.join(self.huffman_codes[char] for char in self.message)
-        self.huff_encoded.insert('1.0', huff_encoded)
+        self.huff_stream = encode_message(self.message, self.huffman_codes)
+        self.huff_encoded.insert('1.0', bits_preview(*self.huff_stream, DISPLAY_BITS))
         
         # Заполняем таблицу символов, частот и кодов в правильном порядке
         total_chars = len(self.message)
@@ -501,8 +391,8 @@ class CodingApp:
             ))
         
         # Статистика
-        sf_length = len(sf_encoded)
-        huff_length = len(huff_encoded)
+        sf_length = self.sf_stream[1]
+        huff_length = self.huff_stream[1]
         original_bits = len(self.message) * 8  # Предполагаем 8 бит на символ
         
         compression_sf = (1 - sf_length / original_bits) * 100
@@ -513,7 +403,21 @@ class CodingApp:
         stats += f"Размер после Шеннона-Фано: {sf_length} бит (сжатие: {compression_sf:.2f}%)\n"
         stats += f"Размер после Хаффмана: {huff_length} бит (сжатие: {compression_huff:.2f}%)\n"
         stats += f"Средняя длина кода Шеннона-Фано: {sf_length/len(self.message):.2f} бит/символ\n"
-        stats += f"Средняя длина кода Хаффмана: {huff_length/len(self.message):.2f} бит/символ"
+        stats += f"Средняя длина кода Хаффмана: {huff_length/len(self.message):.2f} бит/символ\n"
+        
+        # Канонический код Хаффмана с ограниченной длиной кода
+        if len(self.frequencies) <= 1 << MAX_CODE_LENGTH:
+            cost = length_limit_cost(self.frequencies, MAX_CODE_LENGTH)
+            stats += (f"Канонический код Хаффмана с длиной не больше {MAX_CODE_LENGTH}: "
+                      f"{cost['limited_average']:.4f} бит/символ против {cost['free_average']:.4f} "
+                      f"без ограничения (наибольшая длина {cost['free_max_length']}), "
+                      f"потеря {cost['increase']:.3f}%")
+        
+        # Проверка декодирования табличным декодером
+        for name, codes in (("Шеннона-Фано", self.shannon_fano_codes), ("Хаффмана", self.huffman_codes)):
+            check = round_trip(self.message, codes)
+            stats += (f"\nДекодирование кода {name}: {'совпадает' if check['ok'] else 'НЕ СОВПАДАЕТ'}, "
+                      f"кодирование {check['encode_speed']:.1f} МБ/с, декодирование {check['decode_speed']:.1f} МБ/с")
         
         self.stats_text.insert('1.0', stats)
 
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+# (каталог лабораторной, импортируемый модуль, что именно импортируется)
+CASES = [
+    ("1", "main", "Энтропия (ЛР 1): calculate_entropy и расчетные функции"),
+    ("1", "main, matplotlib.pyplot", "ЛР 1 вместе с matplotlib, как было раньше"),
+    ("2", "main", "Энтропия текста (ЛР 2)"),
+    ("3", "coding", "Хаффман и Шеннон-Фано (ЛР 3)"),
+    ("3", "compress", "Консольное сжатие (ЛР 3), без tkinter"),
+    ("3", "main", "ЛР 3 вместе с интерфейсом tkinter"),
+]
+
+REPEATS = 5
+
+
+def measure_import(directory, modules):
+    """
+    Время импорта модулей в отдельном процессе интерпретатора, в секундах.
+    Берется минимум из нескольких запусков, чтобы отсечь шум.
+    """
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"import {modules}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    times = []
+    for _ in range(REPEATS):
+        result = subprocess.run([sys.executable, "-c", code], cwd=directory,
+                                capture_output=True, text=True, check=True)
+        times.append(float(result.stdout))
+    return min(times)
+
+
+def main():
+    root = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'Импорт':<58} {'Время, мс':>10}")
+    print("-" * 70)
+    for directory, modules, title in CASES:
+        seconds = measure_import(os.path.join(root, directory), modules)
+        print(f"{title:<58} {seconds * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()